@@ -0,0 +1,107 @@
+"""
+Benchmark for the columnar shift validation engine.
+
+Compares ShiftValidator.validate_shift_times against the original
+row-by-row implementation on a synthetic multi-year shift set and checks
+that both produce the same issues.
+
+Usage:
+    python scripts/benchmark_validation.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from validation.shift_validator import ShiftValidator
+
+
+def make_shifts(rows: int, physicians: int = 60, seed: int = 0) -> pd.DataFrame:
+    """Generate a synthetic shift set with a mix of valid and invalid shifts."""
+    rng = np.random.default_rng(seed)
+    start = (
+        pd.Timestamp('2020-01-01')
+        + pd.to_timedelta(rng.integers(0, 5 * 365 * 24, rows), unit='h')
+        + pd.to_timedelta(rng.choice([0, 0, 0, 15, 30], rows), unit='m')
+    )
+    duration = pd.to_timedelta(rng.choice([2, 8, 10, 12, 14], rows), unit='h')
+    return pd.DataFrame({
+        'shift_id': np.arange(rows),
+        'physician_id': rng.integers(0, physicians, rows),
+        'start_time': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': (start + duration).strftime('%Y-%m-%d %H:%M:%S'),
+        'shift_type': rng.choice(['day', 'night', 'weekend'], rows)
+    })
+
+
+def legacy_validate_shift_times(validator: ShiftValidator,
+                                shifts_df: pd.DataFrame) -> pd.DataFrame:
+    """Original iterrows() implementation, kept as the benchmark baseline."""
+    issues = []
+    
+    for idx, shift in shifts_df.iterrows():
+        start_time = pd.to_datetime(shift['start_time'])
+        end_time = pd.to_datetime(shift['end_time'])
+        
+        if start_time.minute != 0:
+            issues.append({
+                'shift_id': shift.get('shift_id'),
+                'issue_type': 'non_hourly_start',
+                'description': f"Shift starts at {start_time.strftime('%H:%M')} instead of on the hour"
+            })
+        
+        duration = (end_time - start_time).total_seconds() / 3600
+        if duration < validator.min_shift_hours:
+            issues.append({
+                'shift_id': shift.get('shift_id'),
+                'issue_type': 'short_shift',
+                'description': f"Shift duration ({duration:.1f} hours) is below minimum ({validator.min_shift_hours} hours)"
+            })
+        elif duration > validator.max_shift_hours:
+            issues.append({
+                'shift_id': shift.get('shift_id'),
+                'issue_type': 'long_shift',
+                'description': f"Shift duration ({duration:.1f} hours) exceeds maximum ({validator.max_shift_hours} hours)"
+            })
+    
+    return pd.DataFrame(issues)
+
+
+def timed(func, *args):
+    """Run func once and return its result and elapsed seconds."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    """Run the benchmark and report timings."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    
+    validator = ShiftValidator()
+    shifts_df = make_shifts(args.rows)
+    
+    legacy, legacy_seconds = timed(legacy_validate_shift_times, validator, shifts_df)
+    columnar, columnar_seconds = timed(validator.validate_shift_times, shifts_df)
+    
+    pd.testing.assert_frame_equal(
+        legacy.reset_index(drop=True),
+        columnar.reset_index(drop=True),
+        check_dtype=False
+    )
+    
+    print(f"rows:     {args.rows}")
+    print(f"issues:   {len(columnar)}")
+    print(f"iterrows: {legacy_seconds:.3f}s")
+    print(f"columnar: {columnar_seconds:.3f}s ({legacy_seconds / columnar_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
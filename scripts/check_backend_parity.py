@@ -0,0 +1,149 @@
+"""
+Parity check and benchmark for the Polars backend.
+
+Runs ShiftValidator.run_rules and CompensationCalculator
+.calculate_total_compensation with the pandas and Polars backends over
+naive and timezone-aware synthetic shift sets, with and without a
+differential policy and for monthly, quarterly and yearly evaluation
+periods, and fails unless both backends produce the same frames. Also
+checks shifts around the America/Chicago DST changes and early starts
+after a shift that is still running.
+
+Usage:
+    python scripts/check_backend_parity.py --rows 200000
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from benchmark_validation import make_shifts, timed
+from compensation.calculator import CompensationCalculator
+from compensation.differentials import DifferentialPolicy
+from utils.timestamps import normalize_shift_times
+from validation.shift_validator import ShiftValidator
+
+RATES = {'night': 50.0, 'weekend': 25.0, 'holiday': 75.0}
+
+
+def make_wrvus(shifts_df: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """Generate billing rows for most, but not all, shifts."""
+    rng = np.random.default_rng(seed)
+    wrvu_df = pd.DataFrame({
+        'shift_id': shifts_df['shift_id'],
+        'physician_id': shifts_df['physician_id'],
+        'wrvu': rng.uniform(5, 40, len(shifts_df))
+    })
+    return wrvu_df.sample(frac=0.9, random_state=seed)
+
+
+def check_validation(shifts_df: pd.DataFrame) -> tuple:
+    """Compare rule evaluation across backends; return both timings."""
+    expected, pandas_seconds = timed(ShiftValidator().run_rules, shifts_df)
+    actual, polars_seconds = timed(ShiftValidator(backend='polars').run_rules, shifts_df)
+    pd.testing.assert_frame_equal(actual, expected)
+    return pandas_seconds, polars_seconds
+
+
+def check_compensation(shifts_df: pd.DataFrame, wrvu_df: pd.DataFrame,
+                       policy, evaluation_period: str) -> tuple:
+    """Compare compensation results across backends; return both timings."""
+    kwargs = dict(base_rate=200.0, shift_differentials=RATES, wrvu_target=2.5,
+                  performance_threshold=90.0, differential_policy=policy)
+    expected, pandas_seconds = timed(
+        CompensationCalculator(**kwargs).calculate_total_compensation,
+        shifts_df, wrvu_df, evaluation_period
+    )
+    actual, polars_seconds = timed(
+        CompensationCalculator(**kwargs, backend='polars').calculate_total_compensation,
+        shifts_df, wrvu_df, evaluation_period
+    )
+    for key in expected:
+        pd.testing.assert_frame_equal(actual[key], expected[key], rtol=1e-12)
+    return pandas_seconds, polars_seconds
+
+
+def check_dst_early_start():
+    """Early starts use wall-clock time of day on DST change days."""
+    shifts_df = normalize_shift_times(pd.DataFrame({
+        'shift_id': [1, 2],
+        'physician_id': [1, 2],
+        'start_time': ['2024-03-10 05:00:00', '2024-11-03 04:30:00'],
+        'end_time': ['2024-03-10 15:00:00', '2024-11-03 14:30:00'],
+        'shift_type': ['day', 'day']
+    }), 'America/Chicago')
+    for backend in ('pandas', 'polars'):
+        issues = ShiftValidator(backend=backend).run_rules(shifts_df)
+        flagged = issues.loc[issues['issue_type'] == 'early_start', 'shift_id'].tolist()
+        assert flagged == [2], f"{backend} early starts on DST days: {flagged}"
+
+
+def check_running_preceding_shift():
+    """A shift still running at an early start counts as preceding it."""
+    shifts_df = normalize_shift_times(pd.DataFrame({
+        'shift_id': [1, 2, 3, 4],
+        'physician_id': [7, 7, 8, 8],
+        'start_time': ['2024-01-01 20:00:00', '2024-01-02 04:00:00',
+                       '2024-01-01 10:00:00', '2024-01-02 04:00:00'],
+        'end_time': ['2024-01-02 05:00:00', '2024-01-02 14:00:00',
+                     '2024-01-01 20:00:00', '2024-01-02 14:00:00'],
+        'shift_type': ['night', 'day', 'day', 'day']
+    }), 'UTC')
+    for backend in ('pandas', 'polars'):
+        issues = ShiftValidator(backend=backend).validate_early_starts(shifts_df)
+        flagged = issues['shift_id'].tolist()
+        assert flagged == [4], f"{backend} early starts after running shifts: {flagged}"
+
+
+def check_dst_differentials():
+    """Night shifts across DST changes get differentials for their elapsed hours."""
+    shifts_df = normalize_shift_times(pd.DataFrame({
+        'start_time': ['2024-03-09 19:00:00', '2024-11-02 19:00:00'],
+        'end_time': ['2024-03-10 07:00:00', '2024-11-03 07:00:00']
+    }), 'America/Chicago')
+    night_hours = DifferentialPolicy(RATES).differential_hours(shifts_df)['night_hours']
+    assert night_hours.tolist() == [11.0, 13.0], f"night hours across DST: {night_hours.tolist()}"
+
+
+def main():
+    """Run every parity case and report timings."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    
+    raw = make_shifts(args.rows)
+    cases = {
+        'naive': raw.assign(
+            start_time=pd.to_datetime(raw['start_time']),
+            end_time=pd.to_datetime(raw['end_time'])
+        ),
+        'tz-aware': normalize_shift_times(raw, 'America/Chicago')
+    }
+    wrvu_df = make_wrvus(raw)
+    
+    check_dst_early_start()
+    check_running_preceding_shift()
+    check_dst_differentials()
+    print(f"rows: {args.rows}")
+    for name, shifts_df in cases.items():
+        pandas_seconds, polars_seconds = check_validation(shifts_df)
+        print(f"{name:9} validation            pandas {pandas_seconds:.3f}s  "
+              f"polars {polars_seconds:.3f}s")
+        for policy in (None, DifferentialPolicy(RATES)):
+            for evaluation_period in ('ME', 'QE', 'YE'):
+                pandas_seconds, polars_seconds = check_compensation(
+                    shifts_df, wrvu_df, policy, evaluation_period
+                )
+                label = f"compensation {evaluation_period}{' policy' if policy else ''}"
+                print(f"{name:9} {label:22} pandas {pandas_seconds:.3f}s  "
+                      f"polars {polars_seconds:.3f}s")
+    print("backends match")
+
+
+if __name__ == '__main__':
+    main()
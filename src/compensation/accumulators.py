@@ -0,0 +1,120 @@
+"""
+Combinable physician-period accumulators for ED Physician Compensation System.
+
+Productivity is accumulated as sums (wRVUs, hours, productivity weighted by
+hours) and counts rather than means, so totals built from separate chunks
+of shifts combine by addition into the totals of the whole data set.
+"""
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Additive columns, combined across chunks and periods by summation
+TOTAL_COLUMNS = (
+    'total_pay', 'productivity_bonus', 'shift_hours', 'wrvu',
+    'productivity_sum', 'productivity_count',
+    'weighted_productivity_sum', 'rated_hours', 'shift_count'
+)
+PERIOD_KEYS = ['physician_id', 'start_time']
+
+
+def period_totals(productivity_data: pd.DataFrame, evaluation_period) -> pd.DataFrame:
+    """
+    Accumulate shift-level productivity data per physician and period.
+    
+    Args:
+        productivity_data: Shift-level productivity data with total_pay
+        evaluation_period: Calendar-anchored period for grouping
+    
+    Returns:
+        DataFrame with physician_id, start_time (period label) and the
+        TOTAL_COLUMNS present, plus the last param_performance_threshold
+        when parameters are attached
+    """
+    percentage = productivity_data['productivity_percentage']
+    hours = productivity_data['shift_hours']
+    rated = percentage.notna() & (hours > 0)
+    frame = productivity_data.assign(
+        productivity_sum=percentage.fillna(0),
+        productivity_count=percentage.notna().astype('int64'),
+        weighted_productivity_sum=(percentage * hours).where(rated, 0.0),
+        rated_hours=hours.where(rated, 0.0),
+        shift_count=1
+    )
+    return frame.groupby(
+        ['physician_id', pd.Grouper(key='start_time', freq=evaluation_period)]
+    ).agg(_aggregations(frame)).reset_index()
+
+
+def combine_period_totals(partials: Iterable[pd.DataFrame],
+                          keys: Optional[list] = None) -> pd.DataFrame:
+    """
+    Combine totals from separate chunks of shifts.
+    
+    Args:
+        partials: Outputs of period_totals in chronological order
+        keys: Grouping columns, defaults to physician_id and start_time
+    
+    Returns:
+        Totals as period_totals would produce over the concatenated chunks
+    """
+    partials = [partial for partial in partials if not partial.empty]
+    if not partials:
+        return pd.DataFrame(columns=PERIOD_KEYS + list(TOTAL_COLUMNS))
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(keys or PERIOD_KEYS).agg(_aggregations(combined)).reset_index()
+
+
+def _aggregations(frame: pd.DataFrame) -> Dict[str, str]:
+    """Sum the additive columns; keep the latest performance threshold."""
+    aggregations = {column: 'sum' for column in TOTAL_COLUMNS if column in frame.columns}
+    if 'param_performance_threshold' in frame.columns:
+        aggregations['param_performance_threshold'] = 'last'
+    return aggregations
+
+
+class PeriodAccumulator:
+    """Running physician-period totals fed one chunk of shifts at a time."""
+    
+    def __init__(self, evaluation_period='M'):
+        """
+        Initialize an empty accumulator.
+        
+        Args:
+            evaluation_period: Calendar-anchored period for grouping
+        """
+        self.evaluation_period = evaluation_period
+        self.totals = combine_period_totals([])
+    
+    def add(self, productivity_data: pd.DataFrame) -> 'PeriodAccumulator':
+        """Fold a chunk of shift-level productivity data into the totals."""
+        self.totals = combine_period_totals(
+            [self.totals, period_totals(productivity_data, self.evaluation_period)]
+        )
+        return self
+    
+    def merge(self, other: 'PeriodAccumulator') -> 'PeriodAccumulator':
+        """Fold another accumulator's totals, e.g. from a worker, into these."""
+        self.totals = combine_period_totals([self.totals, other.totals])
+        return self
+
+
+def productivity_percentage(totals: pd.DataFrame, weighting: str = 'shift') -> pd.Series:
+    """
+    Period productivity from accumulated totals.
+    
+    Args:
+        totals: Output of period_totals or combine_period_totals
+        weighting: 'shift' for the mean over rated shifts, 'hours' to weight
+            each shift's productivity by its hours
+    
+    Returns:
+        Series of productivity percentages aligned with totals, NaN when no
+        shift in the period is rated
+    """
+    if weighting == 'hours':
+        numerator, denominator = totals['weighted_productivity_sum'], totals['rated_hours']
+    else:
+        numerator, denominator = totals['productivity_sum'], totals['productivity_count']
+    return numerator / denominator.where(denominator != 0, np.nan)
@@ -4,13 +4,30 @@ Compensation calculation module for ED Physician Compensation System.
 from datetime import datetime
 from typing import Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from compensation.accumulators import period_totals, productivity_percentage
+from compensation.differentials import DifferentialPolicy
+from compensation.money import (
+    SECONDS_PER_HOUR, apply_rate, check_rounding, divide_rounded, to_basis_points,
+    to_cents, to_seconds
+)
+from parameters.store import DIFFERENTIAL_PREFIX, ParameterStore
+from utils.timestamps import ensure_datetime, localize_like
+
 class CompensationCalculator:
     """Handles calculation of physician compensation based on shifts and performance metrics."""
     
     def __init__(self, base_rate: float, shift_differentials: Dict[str, float],
-                 wrvu_target: float, performance_threshold: float):
+                 wrvu_target: float, performance_threshold: float,
+                 differential_policy: Optional[DifferentialPolicy] = None,
+                 productivity_bonus_rate: float = 0.10,
+                 high_productivity_bonus_rate: float = 0.05,
+                 performance_bonus_rate: float = 0.15,
+                 parameter_store: Optional[ParameterStore] = None,
+                 money_mode: str = 'float', rounding: str = 'half_up',
+                 productivity_weighting: str = 'shift', backend: str = 'pandas'):
         """
         Initialize calculator with compensation parameters.
         
@@ -19,11 +36,48 @@ class CompensationCalculator:
             shift_differentials: Dictionary mapping shift types to differential rates
             wrvu_target: Target wRVUs per hour for productivity bonus
             performance_threshold: Required productivity percentage for performance bonus
+            differential_policy: Optional policy paying night, weekend and holiday
+                hours pro rata; when omitted the whole shift is paid by shift_type
+            productivity_bonus_rate: Share of shift pay paid for meeting the wRVU target
+            high_productivity_bonus_rate: Additional share paid at 120% of target
+            performance_bonus_rate: Share of period pay paid for sustained performance
+            parameter_store: Optional effective-dated parameters; when given, each
+                shift is paid with the version in effect at its start and the
+                scalar parameters above are not used for rates or targets
+            money_mode: 'float' for float64 dollars, or 'cents' to hold every pay
+                and bonus amount as exact int64 cents
+            rounding: 'half_up' or 'half_even', applied wherever cents mode
+                divides back to whole cents
+            productivity_weighting: 'shift' to judge performance on the mean of
+                shift productivity, 'hours' to weight each shift by its hours
+            backend: 'pandas', or 'polars' to run calculate_total_compensation
+                as one multithreaded Polars query (requires polars)
         """
+        if money_mode not in ('float', 'cents'):
+            raise ValueError(f"Unknown money mode '{money_mode}', expected 'float' or 'cents'")
+        if backend not in ('pandas', 'polars'):
+            raise ValueError(f"Unknown backend '{backend}', expected 'pandas' or 'polars'")
+        if productivity_weighting not in ('shift', 'hours'):
+            raise ValueError(
+                f"Unknown productivity weighting '{productivity_weighting}', "
+                "expected 'shift' or 'hours'"
+            )
         self.base_rate = base_rate
         self.shift_differentials = shift_differentials
         self.wrvu_target = wrvu_target
         self.performance_threshold = performance_threshold
+        self.differential_policy = differential_policy
+        self.productivity_bonus_rate = productivity_bonus_rate
+        self.high_productivity_bonus_rate = high_productivity_bonus_rate
+        self.performance_bonus_rate = performance_bonus_rate
+        self.parameter_store = parameter_store
+        self.money_mode = money_mode
+        self.rounding = check_rounding(rounding)
+        self.productivity_weighting = productivity_weighting
+        self.backend = backend
+        if backend == 'polars':
+            from compensation import polars_backend
+            polars_backend.check_supported(self)
     
     def calculate_shift_pay(self, shift: pd.Series) -> Dict[str, float]:
         """
@@ -35,25 +89,156 @@ class CompensationCalculator:
         Returns:
             Dictionary containing base pay and differential pay
         """
-        start_time = pd.to_datetime(shift['start_time'])
-        end_time = pd.to_datetime(shift['end_time'])
-        duration = (end_time - start_time).total_seconds() / 3600
+        pay = self.calculate_shift_compensation(
+            self.attach_parameters(pd.DataFrame([shift]))
+        ).iloc[0]
+        
+        amount = int if self.money_mode == 'cents' else float
+        return {
+            'shift_id': shift.get('shift_id'),
+            'base_pay': amount(pay['base_pay']),
+            'differential_pay': amount(pay['differential_pay']),
+            'total_pay': amount(pay['total_pay'])
+        }
+    
+    def calculate_shift_compensation(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculate compensation for every shift with column arithmetic.
+        
+        Produces the same values as applying calculate_shift_pay row by row.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            
+        Returns:
+            DataFrame with shift_id, base_pay, differential_pay and total_pay
+        """
+        if self.money_mode == 'cents':
+            return self._shift_compensation_cents(shifts_df)
+        
+        duration = self._shift_hours(shifts_df).to_numpy(dtype=float)
         
         # Calculate base pay
-        base_pay = duration * self.base_rate
+        base_pay = duration * self._parameter(shifts_df, 'base_rate')
         
-        # Apply shift differential if applicable
-        differential_pay = 0.0
-        shift_type = shift.get('shift_type')
-        if shift_type in self.shift_differentials:
-            differential_pay = duration * self.shift_differentials[shift_type]
+        # Apply shift differential pro rata by policy, or where the shift type has one
+        if self.differential_policy is not None:
+            differential_pay = self._policy_differential_pay(shifts_df)
+        elif 'shift_type' in shifts_df.columns:
+            rate = self._differential_rate(shifts_df)
+            differential_pay = np.where(
+                rate.notna().to_numpy(), duration * rate.to_numpy(dtype=float), 0.0
+            )
+        else:
+            differential_pay = np.zeros(len(shifts_df))
         
-        return {
-            'shift_id': shift.get('shift_id'),
+        shift_ids = shifts_df['shift_id'].to_numpy() if 'shift_id' in shifts_df.columns else None
+        return pd.DataFrame({
+            'shift_id': shift_ids,
             'base_pay': base_pay,
             'differential_pay': differential_pay,
             'total_pay': base_pay + differential_pay
-        }
+        })
+    
+    def _shift_compensation_cents(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """Shift compensation in int64 cents from whole seconds and cent rates."""
+        seconds = to_seconds(self._shift_hours(shifts_df).fillna(0))
+        base_rate = to_cents(self._parameter(shifts_df, 'base_rate'), self.rounding)
+        base_pay = divide_rounded(seconds * base_rate, SECONDS_PER_HOUR, self.rounding)
+        
+        # Price each slice at its cent rate, rounding once per shift
+        if self.differential_policy is not None:
+            policy = self.differential_policy
+            slice_seconds = to_seconds(policy.combination_hours(shifts_df))
+            if 'param_version' in shifts_df.columns:
+                rates = to_cents(np.array([
+                    policy.combination_rates(self.parameter_store.differentials(version))
+                    for version in range(len(self.parameter_store.versions))
+                ]), self.rounding)[shifts_df['param_version'].to_numpy()]
+            else:
+                rates = to_cents(policy.combination_rates(), self.rounding)
+            differential_cents = (slice_seconds * rates).sum(axis=1)
+        elif 'shift_type' in shifts_df.columns:
+            rate = self._differential_rate(shifts_df).fillna(0)
+            differential_cents = seconds * to_cents(rate, self.rounding)
+        else:
+            differential_cents = np.zeros(len(shifts_df), dtype=np.int64)
+        differential_pay = divide_rounded(differential_cents, SECONDS_PER_HOUR, self.rounding)
+        
+        shift_ids = shifts_df['shift_id'].to_numpy() if 'shift_id' in shifts_df.columns else None
+        return pd.DataFrame({
+            'shift_id': shift_ids,
+            'base_pay': base_pay,
+            'differential_pay': differential_pay,
+            'total_pay': base_pay + differential_pay
+        })
+    
+    def _bonus(self, amounts: pd.Series, rate: float) -> pd.Series:
+        """Share of pay amounts, rounded to whole cents in cents mode."""
+        if self.money_mode == 'cents':
+            return pd.Series(
+                apply_rate(amounts, to_basis_points(rate), self.rounding), index=amounts.index
+            )
+        return amounts * rate
+    
+    def attach_parameters(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Attach effective-dated parameters to shifts when a store is configured.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            
+        Returns:
+            Shift data with param_* columns, or the input unchanged
+        """
+        if self.parameter_store is None or 'param_version' in shifts_df.columns:
+            return shifts_df
+        return self.parameter_store.attach(shifts_df)
+    
+    def _parameter(self, df: pd.DataFrame, name: str) -> Union[float, np.ndarray]:
+        """Per-row parameter from attached versions, else the calculator's value."""
+        column = f'param_{name}'
+        if column in df.columns:
+            return df[column].to_numpy(dtype=float)
+        return getattr(self, name)
+    
+    def _differential_rate(self, shifts_df: pd.DataFrame) -> pd.Series:
+        """Hourly differential for each shift's shift_type, NaN where none applies."""
+        if 'param_version' not in shifts_df.columns:
+            return shifts_df['shift_type'].map(self.shift_differentials)
+        
+        shift_types = self.parameter_store.shift_types
+        rates = self.parameter_store.versions[
+            [DIFFERENTIAL_PREFIX + shift_type for shift_type in shift_types]
+        ].to_numpy(dtype=float)
+        codes = pd.Categorical(shifts_df['shift_type'], categories=shift_types).codes
+        version = shifts_df['param_version'].to_numpy()
+        
+        rate = np.full(len(shifts_df), np.nan)
+        known = (codes >= 0) & (version >= 0)
+        rate[known] = rates[version[known], codes[known]]
+        return pd.Series(rate, index=shifts_df.index)
+    
+    def _policy_differential_pay(self, shifts_df: pd.DataFrame) -> np.ndarray:
+        """Pro rata differential pay, priced with each shift's parameter version."""
+        policy = self.differential_policy
+        if 'param_version' not in shifts_df.columns:
+            return policy.differential_pay(shifts_df).to_numpy()
+        
+        rates = np.array([
+            policy.combination_rates(self.parameter_store.differentials(version))
+            for version in range(len(self.parameter_store.versions))
+        ])
+        version = shifts_df['param_version'].to_numpy()
+        return (policy.combination_hours(shifts_df) * rates[version]).sum(axis=1)
+    
+    def _shift_hours(self, shifts_df: pd.DataFrame) -> pd.Series:
+        """Shift durations in hours, trusting hours precomputed at ingest."""
+        if 'shift_hours' in shifts_df.columns:
+            return shifts_df['shift_hours']
+        return (
+            ensure_datetime(shifts_df['end_time']) - ensure_datetime(shifts_df['start_time'])
+        ).dt.total_seconds() / 3600
     
     def calculate_productivity_metrics(self, shifts_df: pd.DataFrame,
                                     wrvu_data: pd.DataFrame) -> pd.DataFrame:
@@ -75,15 +260,12 @@ class CompensationCalculator:
             how='left'
         )
         
-        # Calculate hours and wRVUs per shift
-        merged_data['shift_hours'] = (
-            pd.to_datetime(merged_data['end_time']) - 
-            pd.to_datetime(merged_data['start_time'])
-        ).dt.total_seconds() / 3600
+        # Calculate hours and wRVUs per shift, trusting hours precomputed at ingest
+        merged_data['shift_hours'] = self._shift_hours(merged_data)
         
         merged_data['wrvus_per_hour'] = merged_data['wrvu'] / merged_data['shift_hours']
         merged_data['productivity_percentage'] = (
-            merged_data['wrvus_per_hour'] / self.wrvu_target * 100
+            merged_data['wrvus_per_hour'] / self._parameter(merged_data, 'wrvu_target') * 100
         )
         
         return merged_data
@@ -100,18 +282,18 @@ class CompensationCalculator:
         """
         # Calculate bonus for shifts meeting productivity target
         bonus_data = productivity_data.copy()
-        bonus_data['productivity_bonus'] = 0.0
+        bonus_data['productivity_bonus'] = 0 if self.money_mode == 'cents' else 0.0
         
         # Apply bonus for shifts exceeding target
         qualifying_shifts = bonus_data['productivity_percentage'] >= 100
-        bonus_data.loc[qualifying_shifts, 'productivity_bonus'] = (
-            bonus_data.loc[qualifying_shifts, 'total_pay'] * 0.10  # 10% bonus for meeting target
+        bonus_data.loc[qualifying_shifts, 'productivity_bonus'] = self._bonus(
+            bonus_data.loc[qualifying_shifts, 'total_pay'], self.productivity_bonus_rate
         )
         
         # Additional bonus for exceeding target
         high_performers = bonus_data['productivity_percentage'] >= 120
-        bonus_data.loc[high_performers, 'productivity_bonus'] += (
-            bonus_data.loc[high_performers, 'total_pay'] * 0.05  # Additional 5% for exceeding target
+        bonus_data.loc[high_performers, 'productivity_bonus'] += self._bonus(
+            bonus_data.loc[high_performers, 'total_pay'], self.high_productivity_bonus_rate
         )
         
         return bonus_data
@@ -128,20 +310,59 @@ class CompensationCalculator:
         Returns:
             DataFrame with performance bonus calculations
         """
+        if self.productivity_weighting == 'hours':
+            return self.performance_bonus_from_totals(
+                period_totals(productivity_data, evaluation_period)
+            )
+        
         # Group data by physician and period
-        grouped_data = productivity_data.groupby(
-            ['physician_id', pd.Grouper(key='start_time', freq=evaluation_period)]
-        ).agg({
+        aggregations = {
             'productivity_percentage': 'mean',
             'total_pay': 'sum'
-        }).reset_index()
+        }
+        if 'param_performance_threshold' in productivity_data.columns:
+            # Use the threshold in effect at the end of each period
+            aggregations['param_performance_threshold'] = 'last'
+        grouped_data = productivity_data.groupby(
+            ['physician_id', pd.Grouper(key='start_time', freq=evaluation_period)]
+        ).agg(aggregations).reset_index()
         
         # Calculate performance bonus for qualifying periods
-        grouped_data['performance_bonus'] = 0.0
-        qualifying_periods = grouped_data['productivity_percentage'] >= self.performance_threshold
+        grouped_data['performance_bonus'] = 0 if self.money_mode == 'cents' else 0.0
+        qualifying_periods = (
+            grouped_data['productivity_percentage']
+            >= self._parameter(grouped_data, 'performance_threshold')
+        )
         
-        grouped_data.loc[qualifying_periods, 'performance_bonus'] = (
-            grouped_data.loc[qualifying_periods, 'total_pay'] * 0.15  # 15% bonus for sustained performance
+        grouped_data.loc[qualifying_periods, 'performance_bonus'] = self._bonus(
+            grouped_data.loc[qualifying_periods, 'total_pay'], self.performance_bonus_rate
+        )
+        
+        return grouped_data
+    
+    def performance_bonus_from_totals(self, totals: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculate performance bonuses from accumulated physician-period totals.
+        
+        Args:
+            totals: Output of period_totals or combine_period_totals, possibly
+                combined from separately processed chunks of shifts
+            
+        Returns:
+            Totals with productivity_percentage and performance_bonus added
+        """
+        grouped_data = totals.copy()
+        grouped_data['productivity_percentage'] = productivity_percentage(
+            grouped_data, self.productivity_weighting
+        )
+        
+        grouped_data['performance_bonus'] = 0 if self.money_mode == 'cents' else 0.0
+        qualifying_periods = (
+            grouped_data['productivity_percentage']
+            >= self._parameter(grouped_data, 'performance_threshold')
+        )
+        grouped_data.loc[qualifying_periods, 'performance_bonus'] = self._bonus(
+            grouped_data.loc[qualifying_periods, 'total_pay'], self.performance_bonus_rate
         )
         
         return grouped_data
@@ -160,10 +381,15 @@ class CompensationCalculator:
         Returns:
             Dictionary containing DataFrames for shift pay, productivity, and performance
         """
-        # Calculate base shift compensation
-        shift_pay = pd.DataFrame([
-            self.calculate_shift_pay(shift) for _, shift in shifts_df.iterrows()
-        ])
+        if self.backend == 'polars':
+            from compensation import polars_backend
+            return polars_backend.calculate_total_compensation(
+                self, shifts_df, wrvu_data, evaluation_period
+            )
+        
+        # Attach effective-dated parameters once, then calculate base shift compensation
+        shifts_df = self.attach_parameters(shifts_df)
+        shift_pay = self.calculate_shift_compensation(shifts_df)
         
         # Calculate productivity metrics and bonus
         productivity_data = self.calculate_productivity_metrics(shifts_df, wrvu_data)
@@ -195,9 +421,11 @@ class CompensationCalculator:
             DataFrame containing summarized compensation data
         """
         # Filter data for the specified period
-        period_mask = (
-            pd.to_datetime(compensation_data['productivity_compensation']['start_time'])
-            .between(start_date, end_date)
+        shift_starts = ensure_datetime(
+            compensation_data['productivity_compensation']['start_time']
+        )
+        period_mask = shift_starts.between(
+            localize_like(start_date, shift_starts), localize_like(end_date, shift_starts)
         )
         period_data = compensation_data['productivity_compensation'][period_mask]
         
@@ -210,9 +438,11 @@ class CompensationCalculator:
         }).reset_index()
         
         # Add performance bonus
-        performance_mask = (
-            pd.to_datetime(compensation_data['performance_compensation']['start_time'])
-            .between(start_date, end_date)
+        period_ends = ensure_datetime(
+            compensation_data['performance_compensation']['start_time']
+        )
+        performance_mask = period_ends.between(
+            localize_like(start_date, period_ends), localize_like(end_date, period_ends)
         )
         performance_data = compensation_data['performance_compensation'][performance_mask]
         
@@ -222,6 +452,9 @@ class CompensationCalculator:
             on='physician_id',
             how='left'
         )
+        if self.money_mode == 'cents':
+            # Keep cents exact where a physician has no performance row in range
+            summary['performance_bonus'] = summary['performance_bonus'].astype('Int64')
         
         # Calculate total compensation
         summary['total_compensation'] = (
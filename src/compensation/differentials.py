@@ -0,0 +1,213 @@
+"""
+Time-sliced shift differential engine for ED Physician Compensation System.
+
+Shifts are split at calendar-day and night-window boundaries with interval
+arithmetic, so each slice has a constant combination of applicable
+differentials (night, weekend, holiday) and is paid pro rata for its hours.
+Boundaries are local wall-clock times, but slices are measured between UTC
+instants, so a shift's slice hours add up to its elapsed hours across DST
+changes.
+"""
+from datetime import date, time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.timestamps import ensure_datetime
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+DIFFERENTIAL_TYPES = ('night', 'weekend', 'holiday')
+
+# (night, weekend, holiday) flags, indexed by night + 2 * weekend + 4 * holiday
+COMBINATIONS = [
+    (bool(index & 1), bool(index & 2), bool(index & 4)) for index in range(8)
+]
+
+
+def _wall_clock_ns(values: pd.Series) -> np.ndarray:
+    """Local wall-clock times as int64 nanoseconds, NaT as the int64 minimum."""
+    values = ensure_datetime(values)
+    if values.dt.tz is not None:
+        values = values.dt.tz_localize(None)
+    return values.dt.as_unit('ns').astype('int64').to_numpy()
+
+
+def _instant_ns(values: pd.Series) -> np.ndarray:
+    """UTC instants as int64 nanoseconds, naive times as is, NaT as the int64 minimum."""
+    values = ensure_datetime(values)
+    if values.dt.tz is not None:
+        values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+    return values.dt.as_unit('ns').astype('int64').to_numpy()
+
+
+def _local_instant_ns(wall_clock: np.ndarray, tz) -> np.ndarray:
+    """
+    UTC instants of local wall-clock times given as int64 nanoseconds.
+    
+    Times skipped by a spring-forward change move to the end of the gap, and
+    times repeated by a fall-back change take their first occurrence.
+    """
+    if tz is None:
+        return wall_clock
+    local = pd.DatetimeIndex(wall_clock.astype('datetime64[ns]')).tz_localize(
+        tz, ambiguous=np.ones(len(wall_clock), dtype=bool), nonexistent='shift_forward'
+    )
+    return local.tz_convert('UTC').tz_localize(None).as_unit('ns').asi8
+
+
+def _time_ns(value: time) -> int:
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000_000
+
+
+class DifferentialPolicy:
+    """Classifies shift hours as night, weekend or holiday and prices them."""
+    
+    def __init__(self, rates: Dict[str, float], night_start: time = time(19, 0),
+                 night_end: time = time(7, 0), weekend_days: Iterable[int] = (5, 6),
+                 holidays: Iterable[date] = (), stacking: str = 'stack',
+                 max_rate: Optional[float] = None):
+        """
+        Initialize policy.
+        
+        Args:
+            rates: Additional hourly rate for 'night', 'weekend' and 'holiday' hours
+            night_start: Local time the night window opens
+            night_end: Local time the night window closes; may be on the next day
+            weekend_days: Weekday numbers (Monday=0) paid the weekend differential
+            holidays: Dates paid the holiday differential
+            stacking: 'stack' to add every applicable rate, 'max' to pay the highest
+            max_rate: Optional cap on the combined differential per hour
+        """
+        if stacking not in ('stack', 'max'):
+            raise ValueError(f"Unknown stacking policy '{stacking}', expected 'stack' or 'max'")
+        self.rates = {kind: float(rates.get(kind, 0.0)) for kind in DIFFERENTIAL_TYPES}
+        self.night_start = night_start
+        self.night_end = night_end
+        self.weekend_days = sorted(set(weekend_days))
+        self.holidays = np.array(sorted(set(holidays)), dtype='datetime64[D]').astype('int64')
+        self.stacking = stacking
+        self.max_rate = max_rate
+    
+    def _day_pieces(self):
+        """Split a day at the night window edges into (start, end, is_night) pieces."""
+        night_start = _time_ns(self.night_start)
+        night_end = _time_ns(self.night_end)
+        edges = sorted({0, night_start, night_end, NS_PER_DAY})
+        for lo, hi in zip(edges[:-1], edges[1:]):
+            middle = (lo + hi) // 2
+            if night_start > night_end:
+                is_night = middle >= night_start or middle < night_end
+            else:
+                is_night = night_start <= middle < night_end
+            yield lo, hi, is_night
+    
+    def combination_rates(self, rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Hourly differential for each combination of night, weekend and holiday.
+        
+        Args:
+            rates: Rates to price with, defaults to the policy's own rates
+            
+        Returns:
+            Array of 8 rates indexed by night + 2 * weekend + 4 * holiday
+        """
+        rates = self.rates if rates is None else {
+            kind: float(rates.get(kind, 0.0)) for kind in DIFFERENTIAL_TYPES
+        }
+        combination_rates = np.zeros(len(COMBINATIONS))
+        for index, flags in enumerate(COMBINATIONS):
+            applicable = [rates[kind] for kind, flag in zip(DIFFERENTIAL_TYPES, flags) if flag]
+            if not applicable:
+                continue
+            rate = sum(applicable) if self.stacking == 'stack' else max(applicable)
+            if self.max_rate is not None:
+                rate = min(rate, self.max_rate)
+            combination_rates[index] = rate
+        return combination_rates
+    
+    def combination_hours(self, shifts_df: pd.DataFrame) -> np.ndarray:
+        """
+        Split each shift's hours by combination of night, weekend and holiday.
+        
+        Args:
+            shifts_df: DataFrame containing start_time and end_time
+            
+        Returns:
+            Array of shape (len(shifts_df), 8) indexed like combination_rates
+        """
+        start_time = ensure_datetime(shifts_df['start_time'])
+        end_time = ensure_datetime(shifts_df['end_time'])
+        start = _wall_clock_ns(start_time)
+        end = _wall_clock_ns(end_time)
+        start_instant = _instant_ns(start_time)
+        end_instant = _instant_ns(end_time)
+        count = len(shifts_df)
+        
+        # Expand each shift into one segment per local calendar day it touches
+        missing = np.iinfo(np.int64).min
+        valid = (start != missing) & (end != missing) & (end_instant > start_instant)
+        first_day = np.floor_divide(start, NS_PER_DAY)
+        last_day = np.floor_divide(end - 1, NS_PER_DAY)
+        days = np.where(valid, np.maximum(last_day - first_day + 1, 0), 0)
+        
+        segment_shift = np.repeat(np.arange(count), days)
+        day_offset = np.arange(days.sum()) - np.repeat(np.cumsum(days) - days, days)
+        day_index = first_day[segment_shift] + day_offset
+        segment_start = start_instant[segment_shift]
+        segment_end = end_instant[segment_shift]
+        
+        # 1970-01-01 was a Thursday
+        weekend = np.isin((day_index + 3) % 7, self.weekend_days)
+        holiday = np.isin(day_index, self.holidays)
+        day_combination = 2 * weekend + 4 * holiday
+        
+        # Instant of each piece edge on each day touched, converted once per day
+        pieces = list(self._day_pieces())
+        edges = np.array([lo for lo, _, _ in pieces] + [NS_PER_DAY])
+        unique_days, day_position = np.unique(day_index, return_inverse=True)
+        edge_instants = _local_instant_ns(
+            (unique_days[:, None] * NS_PER_DAY + edges).ravel(), start_time.dt.tz
+        ).reshape(len(unique_days), len(edges))[day_position]
+        
+        hours = np.zeros((count, len(COMBINATIONS)))
+        for position, (_, _, is_night) in enumerate(pieces):
+            piece_hours = np.clip(
+                np.minimum(segment_end, edge_instants[:, position + 1])
+                - np.maximum(segment_start, edge_instants[:, position]),
+                0, None
+            ) / NS_PER_HOUR
+            np.add.at(hours, (segment_shift, day_combination + int(is_night)), piece_hours)
+        return hours
+    
+    def differential_hours(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculate per-shift hours and pay for each differential category.
+        
+        Args:
+            shifts_df: DataFrame containing start_time and end_time
+            
+        Returns:
+            DataFrame aligned with shifts_df holding night_hours, weekend_hours,
+            holiday_hours and differential_pay
+        """
+        hours = self.combination_hours(shifts_df)
+        result = {
+            f'{kind}_hours': hours[:, [flags[position] for flags in COMBINATIONS]].sum(axis=1)
+            for position, kind in enumerate(DIFFERENTIAL_TYPES)
+        }
+        result['differential_pay'] = hours @ self.combination_rates()
+        return pd.DataFrame(result, index=shifts_df.index)
+    
+    def differential_pay(self, shifts_df: pd.DataFrame) -> pd.Series:
+        """
+        Calculate pro rata differential pay for each shift.
+        
+        Args:
+            shifts_df: DataFrame containing start_time and end_time
+            
+        Returns:
+            Series of differential pay aligned with shifts_df
+        """
+        return self.differential_hours(shifts_df)['differential_pay']
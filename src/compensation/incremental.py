@@ -0,0 +1,222 @@
+"""
+Incremental compensation recomputation for ED Physician Compensation System.
+"""
+import pickle
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Day, Tick
+
+from compensation.calculator import CompensationCalculator
+from utils.state_store import changed_shifts, check_shift_ids, load_state, row_hashes, save_state
+from utils.timestamps import ensure_datetime
+
+
+class IncrementalCompensation:
+    """Recomputes only the physician-periods whose shifts or billing changed."""
+    
+    def __init__(self, calculator: CompensationCalculator, store_path: str,
+                 evaluation_period: str = 'M'):
+        """
+        Initialize incremental compensation backed by a local store.
+        
+        Args:
+            calculator: Calculator whose rates and bonus rules are applied
+            store_path: File holding per-shift content hashes and the last results
+            evaluation_period: Period for performance evaluation
+        """
+        try:
+            offset = to_offset(evaluation_period)
+        except ValueError:
+            # Aliases this pandas version rejects fail in the calculator's grouping
+            offset = None
+        if isinstance(offset, (Tick, Day)) and offset.n != 1:
+            # Multi-unit fixed bins start at the data's first day, so a subset
+            # of shifts would be grouped differently from the full data
+            raise ValueError(
+                f"Evaluation period '{evaluation_period}' is not calendar-anchored"
+            )
+        self.calculator = calculator
+        self.store_path = store_path
+        self.evaluation_period = evaluation_period
+    
+    def settings(self) -> Dict[str, Any]:
+        """Calculator settings; a change forces a full recomputation."""
+        calculator = self.calculator
+        store = calculator.parameter_store
+        return {
+            'base_rate': calculator.base_rate,
+            'shift_differentials': calculator.shift_differentials,
+            'wrvu_target': calculator.wrvu_target,
+            'performance_threshold': calculator.performance_threshold,
+            'differential_policy': pickle.dumps(vars(calculator.differential_policy))
+            if calculator.differential_policy is not None else None,
+            'productivity_bonus_rate': calculator.productivity_bonus_rate,
+            'high_productivity_bonus_rate': calculator.high_productivity_bonus_rate,
+            'performance_bonus_rate': calculator.performance_bonus_rate,
+            'parameter_versions': None if store is None
+            else int(pd.util.hash_pandas_object(store.versions).sum()),
+            'money_mode': calculator.money_mode,
+            'rounding': calculator.rounding,
+            'productivity_weighting': calculator.productivity_weighting,
+            'evaluation_period': self.evaluation_period
+        }
+    
+    def calculate_total_compensation(self, shifts_df: pd.DataFrame,
+                                     wrvu_data: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Incremental counterpart of CompensationCalculator.calculate_total_compensation.
+        
+        Args:
+            shifts_df: DataFrame containing shift data with unique shift_id values
+            wrvu_data: DataFrame containing wRVU billing data
+        
+        Returns:
+            Dictionary containing DataFrames for shift pay, productivity, and
+            performance, equal to a full calculation over the current data
+        """
+        settings = self.settings()
+        state = load_state(self.store_path)
+        if state is not None and state['settings'] != settings:
+            state = None
+        snapshot = self._snapshot(shifts_df, wrvu_data, None if state is None else state['shifts'])
+        
+        if state is None:
+            results = self.calculator.calculate_total_compensation(
+                shifts_df, wrvu_data, self.evaluation_period
+            )
+        else:
+            results = self._recompute(shifts_df, wrvu_data, snapshot, state)
+        
+        save_state(self.store_path, {'settings': settings, 'shifts': snapshot, 'results': results})
+        return results
+    
+    def _recompute(self, shifts_df: pd.DataFrame, wrvu_data: pd.DataFrame,
+                   snapshot: pd.DataFrame, state: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+        """
+        Recalculate the dirty physician-periods and patch the stored results.
+        
+        Shift pay and productivity depend only on a shift and its own billing
+        rows, and the performance bonus only on the shifts of one physician in
+        one evaluation period, so every physician-period touched by a changed,
+        added or removed shift (in its old or new period) is recalculated from
+        all of its current shifts and the rest is reused.
+        
+        Args:
+            shifts_df: Current shift data
+            wrvu_data: Current wRVU billing data
+            snapshot: Hashed shift and billing content of the current data
+            state: Stored state from the previous run
+        
+        Returns:
+            Dictionary containing the patched compensation DataFrames
+        """
+        previous = state['shifts']
+        changed = changed_shifts(snapshot, previous)
+        stale = previous['shift_id'].isin(snapshot.loc[changed, 'shift_id'])
+        removed = ~previous['shift_id'].isin(snapshot['shift_id'])
+        
+        dirty_periods = pd.concat([
+            snapshot.loc[changed, ['physician_id', 'period']],
+            previous.loc[stale | removed, ['physician_id', 'period']]
+        ]).drop_duplicates()
+        results = state['results']
+        if dirty_periods.empty:
+            return results
+        
+        dirty = _in_periods(snapshot, dirty_periods).to_numpy()
+        dirty_ids = snapshot.loc[dirty, 'shift_id']
+        fresh = self.calculator.calculate_total_compensation(
+            shifts_df[dirty],
+            wrvu_data[wrvu_data['shift_id'].isin(dirty_ids)],
+            self.evaluation_period
+        )
+        
+        # Reuse shift-level rows of clean shifts in current row order
+        position = pd.Series(np.arange(len(snapshot)), index=snapshot['shift_id'])
+        patched = {}
+        for key in ('shift_compensation', 'productivity_compensation'):
+            kept = results[key]
+            kept = kept[kept['shift_id'].isin(position.index) & ~kept['shift_id'].isin(dirty_ids)]
+            combined = pd.concat([kept, fresh[key]], ignore_index=True)
+            order = combined['shift_id'].map(position).to_numpy().argsort(kind='mergesort')
+            patched[key] = combined.iloc[order].reset_index(drop=True)
+        
+        # Replace the dirty physician-periods, ordered like a grouped calculation
+        kept = results['performance_compensation']
+        kept = kept[~_in_periods(
+            kept.rename(columns={'start_time': 'period'}), dirty_periods
+        ).to_numpy()]
+        patched['performance_compensation'] = pd.concat(
+            [kept, fresh['performance_compensation']], ignore_index=True
+        ).sort_values(['physician_id', 'start_time'], kind='mergesort').reset_index(drop=True)
+        return patched
+    
+    def _snapshot(self, shifts_df: pd.DataFrame, wrvu_data: pd.DataFrame,
+                  previous: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Hash each shift's content together with its billing rows.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            wrvu_data: DataFrame containing wRVU billing data
+            previous: Stored snapshot whose periods are reused for unchanged shifts
+        
+        Returns:
+            DataFrame with shift_id, physician_id, period and row_hash per shift
+        """
+        check_shift_ids(shifts_df, 'Incremental compensation')
+        
+        row_hash = row_hashes(shifts_df)
+        
+        # Billing rows are combined order-independently per shift
+        billing_hash = pd.Series(
+            row_hashes(wrvu_data),
+            index=wrvu_data['shift_id'].to_numpy()
+        ).groupby(level=0).sum()
+        billing = shifts_df['shift_id'].map(billing_hash).fillna(0).astype('uint64').to_numpy()
+        
+        snapshot = pd.DataFrame({
+            'shift_id': shifts_df['shift_id'].to_numpy(),
+            'physician_id': shifts_df['physician_id'].to_numpy(),
+            'row_hash': row_hash ^ (billing * np.uint64(0x9E3779B97F4A7C15))
+        })
+        if previous is None:
+            snapshot['period'] = self._periods(shifts_df)
+            return snapshot
+        
+        # A shift whose content is unchanged keeps its start time and so its period
+        previous = previous.set_index('shift_id')
+        same = (snapshot['row_hash'] == snapshot['shift_id'].map(previous['row_hash'])).to_numpy()
+        periods = snapshot['shift_id'].map(previous['period'])
+        periods[~same] = self._periods(shifts_df[~same]).to_numpy()
+        snapshot['period'] = periods
+        return snapshot
+    
+    def _periods(self, shifts_df: pd.DataFrame) -> pd.Series:
+        """Evaluation period label of each shift, as the performance bonus groups it."""
+        frame = pd.DataFrame({
+            'physician_id': shifts_df['physician_id'],
+            'start_time': ensure_datetime(shifts_df['start_time'])
+        }).reset_index(drop=True)
+        grouped = frame.groupby(
+            ['physician_id', pd.Grouper(key='start_time', freq=self.evaluation_period)]
+        )
+        codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        labels = grouped.size().index.get_level_values('start_time')
+        
+        # Shifts without a start time fall in no period
+        return pd.Series(labels.take(codes), index=frame.index).where(codes >= 0)
+
+
+def _in_periods(frame: pd.DataFrame, periods: pd.DataFrame) -> pd.Series:
+    """Whether each row's (physician_id, period) is one of the given periods."""
+    keys = pd.MultiIndex.from_frame(periods[['physician_id', 'period']])
+    return pd.Series(
+        pd.MultiIndex.from_arrays(
+            [frame['physician_id'], frame['period']]
+        ).isin(keys),
+        index=frame.index
+    )
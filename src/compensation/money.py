@@ -0,0 +1,94 @@
+"""
+Fixed-point money arithmetic for ED Physician Compensation System.
+
+Amounts are held as int64 cents, durations as int64 seconds and bonus shares
+as int64 basis points, so sums are exact and stay vectorized. Every division
+back to cents goes through divide_rounded with an explicit rounding rule.
+"""
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+CENTS_PER_DOLLAR = 100
+SECONDS_PER_HOUR = 3600
+BASIS_POINTS = 10_000
+ROUNDING_MODES = ('half_up', 'half_even')
+
+ArrayLike = Union[float, np.ndarray, pd.Series]
+
+
+def check_rounding(rounding: str) -> str:
+    """Validate a rounding mode name."""
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(
+            f"Unknown rounding mode '{rounding}', expected one of {', '.join(ROUNDING_MODES)}"
+        )
+    return rounding
+
+
+def _round_scaled(scaled: np.ndarray, rounding: str) -> np.ndarray:
+    """Round floats that are already in the target unit to int64."""
+    # Snap away binary representation error (2.675 * 100 == 267.49999...)
+    scaled = np.round(scaled, 6)
+    if check_rounding(rounding) == 'half_even':
+        rounded = np.round(scaled)
+    else:
+        rounded = np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)
+    return rounded.astype(np.int64)
+
+
+def to_cents(amounts: ArrayLike, rounding: str = 'half_up') -> np.ndarray:
+    """
+    Convert dollar amounts or hourly rates to int64 cents.
+    
+    Args:
+        amounts: Dollar values; NaN is not allowed
+        rounding: 'half_up' (away from zero) or 'half_even'
+    
+    Returns:
+        int64 array of cents with the shape of amounts
+    """
+    return _round_scaled(np.asarray(amounts, dtype=float) * CENTS_PER_DOLLAR, rounding)
+
+
+def to_seconds(hours: ArrayLike) -> np.ndarray:
+    """Convert fractional hours to int64 whole seconds."""
+    return _round_scaled(np.asarray(hours, dtype=float) * SECONDS_PER_HOUR, 'half_even')
+
+
+def to_basis_points(rate: float) -> int:
+    """Convert a share such as 0.15 to basis points (1500)."""
+    return int(_round_scaled(np.asarray(rate, dtype=float) * BASIS_POINTS, 'half_even'))
+
+
+def divide_rounded(numerator: ArrayLike, denominator: int,
+                   rounding: str = 'half_up') -> np.ndarray:
+    """
+    Integer division of int64 values with an explicit rounding rule.
+    
+    Args:
+        numerator: int64 values
+        denominator: Positive integer divisor
+        rounding: 'half_up' (away from zero) or 'half_even'
+    
+    Returns:
+        int64 array of rounded quotients
+    """
+    check_rounding(rounding)
+    numerator = np.asarray(numerator, dtype=np.int64)
+    quotient, remainder = np.divmod(numerator, denominator)
+    
+    # divmod floors, so the remainder is in [0, denominator) for either sign
+    twice = 2 * remainder
+    if rounding == 'half_even':
+        round_up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+    else:
+        round_up = (twice > denominator) | ((twice == denominator) & (numerator >= 0))
+    return quotient + round_up
+
+
+def apply_rate(amounts: ArrayLike, basis_points: int, rounding: str = 'half_up') -> np.ndarray:
+    """Take a basis-point share of int64 cent amounts, rounded to cents."""
+    return divide_rounded(np.asarray(amounts, dtype=np.int64) * basis_points,
+                          BASIS_POINTS, rounding)
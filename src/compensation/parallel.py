@@ -0,0 +1,217 @@
+"""
+Partitioned parallel compensation calculation for ED Physician Compensation System.
+
+Every calculation step works within one physician, so shifts are split by
+a stable hash of physician_id, billing rows follow the shift they merge
+with, each partition runs the full calculator pipeline in a worker, and
+results are reassembled in the order a single-process calculation produces.
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from compensation.calculator import CompensationCalculator
+
+EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor
+}
+SOURCE_ROW = '_source_row'
+# Columns the calculator merges billing rows onto shifts with
+BILLING_KEYS = ['shift_id', 'physician_id']
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+Payload = Union[pd.DataFrame, str]
+
+
+def physician_partitions(physician_ids: pd.Series, partitions: int) -> np.ndarray:
+    """
+    Assign each row to a partition by a stable hash of its physician_id.
+    
+    Args:
+        physician_ids: Series of physician identifiers
+        partitions: Number of partitions
+    
+    Returns:
+        Array of partition numbers aligned with physician_ids
+    """
+    hashes = pd.util.hash_pandas_object(physician_ids, index=False).to_numpy()
+    return (hashes % np.uint64(partitions)).astype(np.int64)
+
+
+def _write_arrow(df: pd.DataFrame, path: str) -> str:
+    """Write a frame as an Arrow IPC file for workers to memory-map."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def _read(payload: Payload) -> pd.DataFrame:
+    """Frame passed directly, or memory-mapped from an Arrow IPC file."""
+    if isinstance(payload, pd.DataFrame):
+        return payload
+    with pa.memory_map(payload, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _calculate_partition(calculator: CompensationCalculator, shifts: Payload,
+                         wrvu: Payload, evaluation_period: str) -> Dict[str, pd.DataFrame]:
+    """Run the calculator pipeline over one partition."""
+    return calculator.calculate_total_compensation(_read(shifts), _read(wrvu), evaluation_period)
+
+
+class ParallelCompensation:
+    """Runs CompensationCalculator over physician partitions in a worker pool."""
+    
+    def __init__(self, calculator: CompensationCalculator, executor: Optional[str] = 'process',
+                 max_workers: Optional[int] = None, partitions: Optional[int] = None,
+                 transfer: Optional[str] = None):
+        """
+        Initialize partitioned execution.
+        
+        Args:
+            calculator: Calculator applied to every partition
+            executor: 'process' or 'thread' pool, or None to run partitions in turn
+            max_workers: Maximum pool size, defaults to the CPU count
+            partitions: Number of physician partitions, defaults to twice the
+                pool size so uneven partitions still balance
+            transfer: 'arrow' to hand partitions to workers as memory-mapped
+                Arrow IPC files, 'pickle' to send the frames themselves;
+                defaults to 'arrow' when pyarrow is installed
+        """
+        if executor is not None and executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {sorted(EXECUTORS)}")
+        if transfer is None:
+            transfer = 'arrow' if pa is not None else 'pickle'
+        if transfer not in ('arrow', 'pickle'):
+            raise ValueError(f"Unknown transfer '{transfer}', expected 'arrow' or 'pickle'")
+        if transfer == 'arrow' and pa is None:
+            raise ImportError("Arrow transfer requires pyarrow")
+        
+        self.calculator = calculator
+        self.executor = executor
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.partitions = partitions or 2 * self.max_workers
+        self.transfer = transfer
+    
+    def split(self, shifts_df: pd.DataFrame,
+              wrvu_data: pd.DataFrame) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Split shifts and billing rows into physician partitions.
+        
+        Shifts are tagged with their source row so results can be reassembled
+        in input order; empty partitions are dropped. Billing rows are matched
+        to shifts the way the calculator merges them, so key dtypes that
+        differ between the frames cannot separate a shift from its billing;
+        billing rows that match no shift are left out, as no shift uses them.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            wrvu_data: DataFrame containing wRVU billing data
+        
+        Returns:
+            List of (shifts, wrvu) frame pairs
+        """
+        shifts = shifts_df.reset_index(drop=True)
+        shifts[SOURCE_ROW] = np.arange(len(shifts))
+        shift_partition = physician_partitions(shifts['physician_id'], self.partitions)
+        owners = shifts[BILLING_KEYS].assign(_partition=shift_partition)
+        owners = owners.drop_duplicates(BILLING_KEYS)
+        wrvu_partition = pd.merge(
+            wrvu_data[BILLING_KEYS], owners, on=BILLING_KEYS, how='left'
+        )['_partition'].fillna(-1).to_numpy()
+        return [
+            (shifts[shift_partition == partition], wrvu_data[wrvu_partition == partition])
+            for partition in range(self.partitions)
+            if (shift_partition == partition).any()
+        ]
+    
+    def calculate_total_compensation(self, shifts_df: pd.DataFrame,
+                                     wrvu_data: pd.DataFrame,
+                                     evaluation_period: str = 'M') -> Dict[str, pd.DataFrame]:
+        """
+        Partitioned counterpart of CompensationCalculator.calculate_total_compensation.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            wrvu_data: DataFrame containing wRVU billing data
+            evaluation_period: Period for performance evaluation
+        
+        Returns:
+            Dictionary containing DataFrames for shift pay, productivity, and
+            performance, in the same order a single calculation produces
+        """
+        parts = self.split(shifts_df, wrvu_data)
+        if not parts:
+            return self.calculator.calculate_total_compensation(
+                shifts_df, wrvu_data, evaluation_period
+            )
+        source_rows = [shifts[SOURCE_ROW].to_numpy() for shifts, _ in parts]
+        with tempfile.TemporaryDirectory(prefix='compensation-') as workdir:
+            if self.transfer == 'arrow':
+                parts = [
+                    (_write_arrow(shifts, os.path.join(workdir, f'shifts-{index}.arrow')),
+                     _write_arrow(wrvu, os.path.join(workdir, f'wrvu-{index}.arrow')))
+                    for index, (shifts, wrvu) in enumerate(parts)
+                ]
+            
+            # Partition results stay in partition order; _combine restores input order
+            if self.executor is None:
+                results = [
+                    _calculate_partition(self.calculator, shifts, wrvu, evaluation_period)
+                    for shifts, wrvu in parts
+                ]
+            else:
+                with EXECUTORS[self.executor](max_workers=self.max_workers) as pool:
+                    futures = [
+                        pool.submit(_calculate_partition, self.calculator, shifts, wrvu,
+                                    evaluation_period)
+                        for shifts, wrvu in parts
+                    ]
+                    results = [future.result() for future in futures]
+        
+        return _combine(results, source_rows)
+
+
+def _combine(results: List[Dict[str, pd.DataFrame]],
+             source_rows: List[np.ndarray]) -> Dict[str, pd.DataFrame]:
+    """
+    Reassemble partition results in single-calculation order.
+    
+    Args:
+        results: Calculator output of each partition
+        source_rows: Input row numbers of each partition's shifts
+    
+    Returns:
+        Dictionary containing the combined compensation DataFrames
+    """
+    # Shift pay follows each partition's shift order; productivity rows carry
+    # their shift's source row through the billing merge
+    shift_pay = pd.concat(
+        [result['shift_compensation'] for result in results], ignore_index=True
+    )
+    order = np.concatenate(source_rows).argsort(kind='mergesort') if source_rows else []
+    shift_pay = shift_pay.iloc[order].reset_index(drop=True)
+    
+    productivity = pd.concat(
+        [result['productivity_compensation'] for result in results], ignore_index=True
+    )
+    order = productivity[SOURCE_ROW].to_numpy().argsort(kind='mergesort')
+    productivity = productivity.iloc[order].drop(columns=SOURCE_ROW).reset_index(drop=True)
+    
+    return {
+        'shift_compensation': shift_pay,
+        'productivity_compensation': productivity,
+        'performance_compensation': pd.concat(
+            [result['performance_compensation'] for result in results], ignore_index=True
+        ).sort_values(['physician_id', 'start_time'], kind='mergesort').reset_index(drop=True)
+    }
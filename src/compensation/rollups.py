@@ -0,0 +1,84 @@
+"""
+Period roll-ups of physician compensation for ED Physician Compensation System.
+
+Shift-level productivity data is aggregated once into monthly physician
+totals held as sums and counts, never means, so quarter, year and arbitrary
+range views are exact re-aggregations of the monthly rows.
+"""
+from datetime import datetime
+from typing import Union
+
+import pandas as pd
+
+from compensation.accumulators import combine_period_totals, period_totals
+from compensation.calculator import CompensationCalculator
+from utils.timestamps import ensure_datetime, localize_like
+
+MONTHLY = pd.offsets.MonthEnd()
+
+
+def monthly_aggregates(productivity_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate shift-level productivity data to physician-months.
+    
+    Args:
+        productivity_data: Output of calculate_productivity_bonus, or of
+            calculate_productivity_metrics merged with shift pay
+    
+    Returns:
+        DataFrame with physician_id, start_time (month-end label) and the
+        accumulated totals of each month
+    """
+    return period_totals(productivity_data, MONTHLY)
+
+
+class PerformanceRollup:
+    """Monthly physician aggregates with quarter, year and range views."""
+    
+    def __init__(self, calculator: CompensationCalculator, productivity_data: pd.DataFrame):
+        """
+        Aggregate the productivity data to physician-months once.
+        
+        Args:
+            calculator: Calculator supplying the performance threshold and bonus rate
+            productivity_data: Shift-level productivity data with pay and bonuses
+        """
+        self.calculator = calculator
+        self.monthly = monthly_aggregates(productivity_data)
+    
+    def view(self, evaluation_period: Union[str, pd.DateOffset] = MONTHLY) -> pd.DataFrame:
+        """
+        Performance compensation for a monthly or coarser evaluation period.
+        
+        Matches calculate_performance_bonus over the same productivity data,
+        but groups only the monthly rows.
+        
+        Args:
+            evaluation_period: Calendar period containing whole months, e.g. 'QE' or 'YE'
+        
+        Returns:
+            DataFrame with physician_id, start_time (period label), the summed
+            columns, productivity_percentage and performance_bonus
+        """
+        grouped = combine_period_totals(
+            [self.monthly],
+            keys=['physician_id', pd.Grouper(key='start_time', freq=evaluation_period)]
+        )
+        return self.calculator.performance_bonus_from_totals(grouped)
+    
+    def totals(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Per-physician totals over the months whose labels fall in a range.
+        
+        Args:
+            start_date: Start of the range
+            end_date: End of the range; a month counts when its month-end is inside
+        
+        Returns:
+            DataFrame with one row per physician holding the summed columns,
+            productivity_percentage and performance_bonus for the whole range
+        """
+        labels = ensure_datetime(self.monthly['start_time'])
+        in_range = labels.between(localize_like(start_date, labels), localize_like(end_date, labels))
+        months = combine_period_totals([self.monthly[in_range]], keys=['physician_id'])
+        return self.calculator.performance_bonus_from_totals(months)
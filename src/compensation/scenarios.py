@@ -0,0 +1,200 @@
+"""
+Batch what-if scenario engine for ED Physician Compensation System.
+
+Shift hours, wRVUs and differential hour buckets are computed once; every
+candidate parameter set is then evaluated by broadcasting over those shared
+arrays instead of re-running CompensationCalculator per scenario.
+"""
+import itertools
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from compensation.calculator import CompensationCalculator
+
+SCALAR_PARAMETERS = (
+    'base_rate',
+    'wrvu_target',
+    'performance_threshold',
+    'productivity_bonus_rate',
+    'high_productivity_bonus_rate',
+    'performance_bonus_rate'
+)
+
+RESULT_COLUMNS = ['total_pay', 'productivity_bonus', 'performance_bonus', 'total_compensation']
+
+
+def parameter_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand a parameter grid into the list of all combinations.
+    
+    Args:
+        grid: Mapping of parameter name to candidate values
+        
+    Returns:
+        List of scenario dictionaries, one per combination
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+class ScenarioEngine:
+    """Evaluates many compensation parameter sets in one pass over shared data."""
+    
+    def __init__(self, calculator: CompensationCalculator, shifts_df: pd.DataFrame,
+                 wrvu_data: pd.DataFrame, evaluation_period: str = 'M'):
+        """
+        Prepare the shared shift and wRVU arrays.
+        
+        Args:
+            calculator: Calculator supplying defaults for parameters a scenario omits
+            shifts_df: DataFrame containing shift data
+            wrvu_data: DataFrame containing wRVU billing data
+            evaluation_period: Period for performance evaluation
+        """
+        self.calculator = calculator
+        productivity = calculator.calculate_productivity_metrics(shifts_df, wrvu_data)
+        
+        # Order rows by (physician, period) so groups are contiguous slices
+        groups = productivity.groupby(
+            ['physician_id', pd.Grouper(key='start_time', freq=evaluation_period)]
+        ).ngroup().to_numpy()
+        order = np.argsort(groups, kind='mergesort')
+        order = order[groups[order] >= 0]
+        productivity = productivity.iloc[order].reset_index(drop=True)
+        groups = groups[order]
+        
+        self.hours = productivity['shift_hours'].to_numpy(dtype=float)
+        self.wrvus_per_hour = productivity['wrvus_per_hour'].to_numpy(dtype=float)
+        self.group_starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        # Productivity weight per row: 1 per rated shift, or its hours
+        rated = ~np.isnan(self.wrvus_per_hour)
+        if calculator.productivity_weighting == 'hours':
+            rated = rated & (self.hours > 0)
+            self.productivity_weight = np.where(rated, self.hours, 0.0)
+        else:
+            self.productivity_weight = rated.astype(float)
+        self.group_rated = np.add.reduceat(
+            self.productivity_weight, self.group_starts
+        ) if len(groups) else np.zeros(0)
+        
+        physicians = productivity['physician_id'].to_numpy()
+        group_physicians = physicians[self.group_starts]
+        self.physician_group_starts = np.flatnonzero(
+            np.r_[True, group_physicians[1:] != group_physicians[:-1]]
+        ) if len(groups) else np.zeros(0, dtype=int)
+        self.physician_ids = group_physicians[self.physician_group_starts]
+        self.physician_row_starts = self.group_starts[self.physician_group_starts]
+        
+        # Differential hours by bucket: policy combinations or shift types
+        policy = calculator.differential_policy
+        if policy is not None:
+            self.differential_hours = policy.combination_hours(productivity)
+        else:
+            shift_types = (productivity['shift_type'] if 'shift_type' in productivity.columns
+                           else pd.Series(None, index=productivity.index, dtype=object))
+            codes, self.shift_types = pd.factorize(shift_types)
+            self.differential_hours = np.zeros((len(productivity), len(self.shift_types)))
+            rated = codes >= 0
+            self.differential_hours[np.flatnonzero(rated), codes[rated]] = self.hours[rated]
+    
+    def _differential_rates(self, scenarios: List[Dict[str, Any]]) -> np.ndarray:
+        """Hourly rate per differential bucket for each scenario, shape (buckets, S)."""
+        rates = []
+        for scenario in scenarios:
+            differentials = scenario.get('shift_differentials', self.calculator.shift_differentials)
+            if self.calculator.differential_policy is not None:
+                rates.append(self.calculator.differential_policy.combination_rates(differentials))
+            else:
+                rates.append([differentials.get(shift_type, 0.0) for shift_type in self.shift_types])
+        return np.array(rates, dtype=float).reshape(len(scenarios), -1).T
+    
+    def _evaluate_batch(self, scenarios: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Per-physician results for a batch of scenarios, each of shape (P, S)."""
+        params = {
+            name: np.array([scenario.get(name, getattr(self.calculator, name))
+                            for scenario in scenarios], dtype=float)
+            for name in SCALAR_PARAMETERS
+        }
+        
+        # Shift pay, shape (rows, S)
+        total_pay = (
+            self.hours[:, None] * params['base_rate'][None, :]
+            + self.differential_hours @ self._differential_rates(scenarios)
+        )
+        
+        # Productivity bonus per shift
+        with np.errstate(invalid='ignore', divide='ignore'):
+            productivity = self.wrvus_per_hour[:, None] / params['wrvu_target'][None, :] * 100
+        productivity_bonus = total_pay * (
+            np.where(productivity >= 100, params['productivity_bonus_rate'][None, :], 0.0)
+            + np.where(productivity >= 120, params['high_productivity_bonus_rate'][None, :], 0.0)
+        )
+        
+        # Performance bonus per (physician, period) on mean or hours-weighted productivity
+        group_pay = np.add.reduceat(total_pay, self.group_starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            group_productivity = (
+                np.add.reduceat(
+                    np.where(self.productivity_weight[:, None] > 0,
+                             productivity * self.productivity_weight[:, None], 0.0),
+                    self.group_starts, axis=0
+                )
+                / self.group_rated[:, None]
+            )
+        performance_bonus = np.where(
+            group_productivity >= params['performance_threshold'][None, :],
+            group_pay * params['performance_bonus_rate'][None, :],
+            0.0
+        )
+        
+        results = {
+            'total_pay': np.add.reduceat(total_pay, self.physician_row_starts, axis=0),
+            'productivity_bonus': np.add.reduceat(
+                productivity_bonus, self.physician_row_starts, axis=0
+            ),
+            'performance_bonus': np.add.reduceat(
+                performance_bonus, self.physician_group_starts, axis=0
+            )
+        }
+        results['total_compensation'] = (
+            results['total_pay'] + results['productivity_bonus'] + results['performance_bonus']
+        )
+        return results
+    
+    def evaluate(self, scenarios: Sequence[Dict[str, Any]],
+                 batch_size: int = 64) -> pd.DataFrame:
+        """
+        Evaluate compensation for every scenario.
+        
+        Args:
+            scenarios: Parameter sets, e.g. from parameter_grid; omitted
+                parameters fall back to the calculator's values, and
+                shift_differentials price the calculator's differential
+                policy buckets when it has one
+            batch_size: Scenarios broadcast together, bounding memory to
+                rows x batch_size values per intermediate array
+            
+        Returns:
+            Result cube as a DataFrame indexed by (physician_id, scenario)
+            with total_pay, productivity_bonus, performance_bonus and
+            total_compensation columns; unstack('scenario') for a
+            physician-by-scenario view
+        """
+        scenarios = list(scenarios)
+        batches = [
+            self._evaluate_batch(scenarios[start:start + batch_size])
+            for start in range(0, len(scenarios), batch_size)
+        ]
+        
+        # Stack into (physician, scenario) ordered rows
+        cube = {
+            column: np.concatenate([batch[column] for batch in batches], axis=1).ravel()
+            if batches else np.zeros(0)
+            for column in RESULT_COLUMNS
+        }
+        index = pd.MultiIndex.from_product(
+            [self.physician_ids, range(len(scenarios))], names=['physician_id', 'scenario']
+        )
+        return pd.DataFrame(cube, index=index)
@@ -0,0 +1,150 @@
+"""
+Columnar query results for ED Physician Compensation System.
+
+Result sets are read into Arrow tables: through arrow-odbc when it is
+installed, which fills Arrow buffers in native code, or otherwise by
+transposing each fetchmany batch into columns typed from the cursor
+description. Arrow tables hand off to Polars without copying
+(pl.from_arrow) and to pandas with at most one copy per column.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+
+try:
+    import arrow_odbc
+except ImportError:  # pragma: no cover - arrow-odbc is optional
+    arrow_odbc = None
+
+# DB-API type codes reported by pyodbc -> Arrow column type
+ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bytes: pa.binary(),
+    bytearray: pa.binary(),
+    datetime: pa.timestamp('us'),
+    date: pa.date32(),
+    time: pa.time64('us')
+}
+READERS = ('auto', 'arrow-odbc', 'cursor')
+
+
+def result_schema(description: Sequence[tuple]) -> List[tuple]:
+    """
+    Arrow type of each result column, from a DB-API cursor description.
+    
+    Args:
+        description: cursor.description
+    
+    Returns:
+        List of (name, arrow type, cast) tuples; the type is None when the
+        driver reports no usable type code and values are inferred instead,
+        and cast is the type decimals are converted to after loading
+    """
+    columns = []
+    for name, type_code, _, _, precision, scale, *_ in description:
+        if type_code is Decimal:
+            # Decimals load exactly, then become floats as read_dataframe's do
+            columns.append((name, pa.decimal128(precision or 38, scale or 0), pa.float64()))
+        else:
+            columns.append((name, ARROW_TYPES.get(type_code), None))
+    return columns
+
+
+def record_batch(rows: Sequence[Sequence[Any]], columns: List[tuple]) -> pa.RecordBatch:
+    """
+    Transpose fetched rows into one typed Arrow record batch.
+    
+    Args:
+        rows: Rows from fetchmany
+        columns: Column types from result_schema
+    
+    Returns:
+        RecordBatch with one array per result column
+    """
+    # One C-level copy into a 2-D object array, then one typed copy per column
+    values = np.empty((len(rows), len(columns)), dtype=object)
+    values[:] = rows
+    arrays = []
+    for index, (_, arrow_type, cast) in enumerate(columns):
+        array = pa.array(values[:, index], type=arrow_type)
+        arrays.append(array.cast(cast) if cast is not None else array)
+    return pa.RecordBatch.from_arrays(arrays, names=[name for name, _, _ in columns])
+
+
+def cursor_batches(cursor, batch_size: int) -> Iterator[pa.RecordBatch]:
+    """
+    Stream an executed cursor's result set as typed record batches.
+    
+    Args:
+        cursor: DB-API cursor with a pending result set
+        batch_size: Rows fetched per round trip
+    
+    Yields:
+        RecordBatch of up to batch_size rows
+    """
+    columns = result_schema(cursor.description)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield record_batch(rows, columns)
+
+
+def _empty_table(columns: List[tuple]) -> pa.Table:
+    return pa.table({
+        name: pa.array([], type=cast or arrow_type or pa.null())
+        for name, arrow_type, cast in columns
+    })
+
+
+def fetch_table(cursor, batch_size: int) -> pa.Table:
+    """
+    Read an executed cursor's whole result set into an Arrow table.
+    
+    Args:
+        cursor: DB-API cursor with a pending result set
+        batch_size: Rows fetched per round trip
+    
+    Returns:
+        Table with one chunk per fetched batch
+    """
+    batches = list(cursor_batches(cursor, batch_size))
+    if not batches:
+        return _empty_table(result_schema(cursor.description))
+    return pa.Table.from_batches(batches)
+
+
+def odbc_table(query: str, connection_string: str, params: Optional[Sequence[Any]] = None,
+               batch_size: int = 10000) -> pa.Table:
+    """
+    Read a query's result set with arrow-odbc, which fills Arrow buffers natively.
+    
+    arrow-odbc opens its own connection, so the query does not see
+    uncommitted work on a pooled connection.
+    
+    Args:
+        query: SQL query
+        connection_string: ODBC connection string
+        params: Positional parameters for the query's ? placeholders
+        batch_size: Rows per fetched batch
+    
+    Returns:
+        Table of the result set
+    """
+    if arrow_odbc is None:
+        raise ImportError("The arrow-odbc reader requires the arrow-odbc package")
+    # arrow-odbc binds parameters as text; the server converts them
+    parameters = None if params is None else [
+        None if value is None else str(value) for value in params
+    ]
+    reader = arrow_odbc.read_arrow_batches_from_odbc(
+        query=query, connection_string=connection_string,
+        parameters=parameters, batch_size=batch_size
+    )
+    return pa.Table.from_batches(list(reader), schema=reader.schema)
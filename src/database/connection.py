@@ -2,62 +2,401 @@
 Database connection module for ED Physician Compensation System.
 """
 import os
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
+import pandas as pd
 import pyodbc
 from dotenv import load_dotenv
 
+from database import upsert
+from database.pool import ConnectionPool
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
 load_dotenv()
 
+# Rows fetched per round trip when streaming result sets
+DEFAULT_BATCH_SIZE = 10000
+
+# Errors after which a pooled connection is closed rather than reused
+CONNECTION_ERRORS = (pyodbc.OperationalError, pyodbc.InterfaceError)
+
+_shared_pool: Optional[ConnectionPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def connection_string() -> str:
+    """Build the ODBC connection string from environment settings."""
+    return (
+        f'DRIVER={{SQL Server}};'
+        f'SERVER={os.getenv("DB_SERVER")};'
+        f'DATABASE={os.getenv("DB_NAME")};'
+        f'UID={os.getenv("DB_USERNAME")};'
+        f'PWD={os.getenv("DB_PASSWORD")}'
+    )
+
+
+def result_columns(cursor: pyodbc.Cursor) -> List[str]:
+    """Column names of the cursor's current result set."""
+    return [column[0] for column in cursor.description]
+
+
+def parameter_rows(df: pd.DataFrame) -> List[Tuple[Any, ...]]:
+    """
+    Convert DataFrame rows to tuples of plain Python values for DB-API binding.
+    
+    Missing values become None, numpy scalars become Python numbers and
+    timestamps become datetime objects.
+    
+    Args:
+        df: Rows to bind
+    
+    Returns:
+        List of row tuples in column order
+    """
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = pd.Series(series.dt.to_pydatetime(), index=series.index, dtype=object)
+        else:
+            values = series.astype(object)
+        columns.append(values.where(series.notna(), None).tolist())
+    return list(zip(*columns))
+
+
+def shared_pool() -> ConnectionPool:
+    """
+    Process-wide pool of SQL Server connections, created on first use.
+    
+    Sized by DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE and DB_POOL_IDLE_SECONDS.
+    
+    Returns:
+        ConnectionPool opening pyodbc connections
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(
+                lambda: pyodbc.connect(connection_string()),
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', '0')),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', '5')),
+                max_idle_seconds=float(os.getenv('DB_POOL_IDLE_SECONDS', '300'))
+            )
+        return _shared_pool
+
+
 class DatabaseConnection:
     """Handles database connections and operations."""
     
-    def __init__(self):
-        """Initialize database connection parameters."""
-        self.server = os.getenv('DB_SERVER')
-        self.database = os.getenv('DB_NAME')
-        self.username = os.getenv('DB_USERNAME')
-        self.password = os.getenv('DB_PASSWORD')
+    # Driver errors; connections raising connection_errors are not reused
+    error = pyodbc.Error
+    connection_errors = CONNECTION_ERRORS
+    # SQL dialect of set-based statements, see database.upsert
+    dialect = 'mssql'
+    
+    def __init__(self, pool: Optional[ConnectionPool] = None):
+        """
+        Initialize the database connection; settings are read from the
+        environment by connection_string when connecting.
+        
+        Args:
+            pool: Optional pool to check connections out of instead of opening
+                a new connection on every connect; see shared_pool
+        """
+        self.pool = pool
         self.conn = None
         self.cursor = None
     
+    def _open(self) -> Any:
+        """Open a new, unpooled driver connection."""
+        return pyodbc.connect(connection_string())
+    
     def connect(self) -> None:
-        """Establish database connection."""
-        connection_string = (
-            f'DRIVER={{SQL Server}};'
-            f'SERVER={self.server};'
-            f'DATABASE={self.database};'
-            f'UID={self.username};'
-            f'PWD={self.password}'
-        )
-        
+        """Establish database connection, reusing a pooled one when configured."""
         try:
-            self.conn = pyodbc.connect(connection_string)
+            if self.pool is not None:
+                self.conn = self.pool.acquire()
+            else:
+                self.conn = self._open()
             self.cursor = self.conn.cursor()
-        except pyodbc.Error as e:
+        except self.error as e:
             raise ConnectionError(f"Failed to connect to database: {str(e)}")
     
-    def disconnect(self) -> None:
-        """Close database connection."""
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+    def disconnect(self, discard: bool = False) -> None:
+        """
+        Close database connection, or return it to the pool.
+        
+        Args:
+            discard: Close a pooled connection instead of reusing it; a
+                connection whose cursor fails to close is always discarded
+        """
+        conn, cursor = self.conn, self.cursor
+        self.conn = None
+        self.cursor = None
+        try:
+            if cursor:
+                cursor.close()
+        except Exception:
+            # A cursor that cannot close leaves its connection unusable
+            discard = True
+            raise
+        finally:
+            if conn:
+                if self.pool is not None:
+                    self.pool.release(conn, discard=discard)
+                else:
+                    conn.close()
     
-    def execute_query(self, query: str, params: Dict[str, Any] = None) -> pyodbc.Cursor:
+    def execute_query(self, query: str, params: Sequence[Any] = None) -> pyodbc.Cursor:
         """Execute SQL query with optional parameters."""
         try:
             if params:
                 return self.cursor.execute(query, params)
             return self.cursor.execute(query)
-        except pyodbc.Error as e:
+        except self.error as e:
             raise Exception(f"Query execution failed: {str(e)}")
     
+    def execute_query_batches(self, query: str, params: Sequence[Any] = None,
+                              batch_size: int = DEFAULT_BATCH_SIZE,
+                              arrow: bool = False) -> Iterator[Union[pd.DataFrame, 'pa.RecordBatch']]:
+        """
+        Execute SQL query and stream its result set in batches.
+        
+        Rows are fetched batch_size at a time, so only one batch of driver
+        rows is held in memory at once.
+        
+        Args:
+            query: SQL query
+            params: Positional parameters for the query's ? placeholders
+            batch_size: Rows fetched per round trip
+            arrow: Yield pyarrow RecordBatches, typed from the cursor
+                description, instead of DataFrames
+        
+        Yields:
+            DataFrame, or RecordBatch, of up to batch_size rows named after
+            the result set's columns; numeric decimals become floats
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if arrow and pa is None:
+            raise ImportError("Arrow batches require pyarrow")
+        
+        cursor = self.execute_query(query, params)
+        if arrow:
+            from database.columnar import cursor_batches
+            yield from cursor_batches(cursor, batch_size)
+            return
+        
+        columns = result_columns(cursor)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    
+    def read_dataframe(self, query: str, params: Sequence[Any] = None,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+        """
+        Execute SQL query and read its whole result set into a DataFrame.
+        
+        Args:
+            query: SQL query
+            params: Positional parameters for the query's ? placeholders
+            batch_size: Rows fetched per round trip
+        
+        Returns:
+            DataFrame with the result set's column names, empty if no rows match
+        """
+        frames = list(self.execute_query_batches(query, params, batch_size))
+        if not frames:
+            return pd.DataFrame(columns=result_columns(self.cursor))
+        return pd.concat(frames, ignore_index=True)
+    
+    def read_arrow(self, query: str, params: Sequence[Any] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, reader: str = 'cursor') -> 'pa.Table':
+        """
+        Execute SQL query and read its result set into an Arrow table.
+        
+        Values are copied into typed column buffers once per batch instead of
+        building a Python object per row. Convert with table.to_pandas(), or
+        pl.from_arrow(table) for Polars without a copy.
+        
+        Args:
+            query: SQL query
+            params: Positional parameters for the query's ? placeholders
+            batch_size: Rows fetched per round trip
+            reader: 'cursor' to accumulate columns from this connection's
+                cursor, 'arrow-odbc' to read natively over a new connection
+                opened outside the pool for each call, or 'auto' for
+                arrow-odbc when installed
+        
+        Returns:
+            Table with the result set's column names and types
+        """
+        if pa is None:
+            raise ImportError("Arrow results require pyarrow")
+        from database import columnar
+        if reader not in columnar.READERS:
+            raise ValueError(f"Unknown reader '{reader}', expected one of {columnar.READERS}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if reader == 'auto':
+            reader = 'cursor' if columnar.arrow_odbc is None else 'arrow-odbc'
+        if reader == 'arrow-odbc':
+            if columnar.arrow_odbc is None:
+                raise ImportError("The arrow-odbc reader requires the arrow-odbc package")
+            try:
+                return columnar.odbc_table(query, connection_string(), params, batch_size)
+            except columnar.arrow_odbc.Error as e:
+                raise Exception(f"Query execution failed: {str(e)}")
+        return columnar.fetch_table(self.execute_query(query, params), batch_size)
+    
+    def bulk_insert(self, table: str, df: pd.DataFrame,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, float]:
+        """
+        Insert DataFrame rows in batches, one transaction per batch.
+        
+        Each batch is sent with executemany; pyodbc cursors bind it as one
+        parameter array (fast_executemany) instead of a round trip per row.
+        Batches before a failing one stay committed.
+        
+        Args:
+            table: Destination table; its columns are named after df's
+            df: Rows to insert
+            batch_size: Rows per executemany call and transaction
+        
+        Returns:
+            Dictionary with rows, batches, seconds and rows_per_second
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        query = (
+            f"INSERT INTO {table} ({', '.join(df.columns)}) "
+            f"VALUES ({', '.join('?' * len(df.columns))})"
+        )
+        if hasattr(self.cursor, 'fast_executemany'):
+            self.cursor.fast_executemany = True
+        
+        started = time.perf_counter()
+        batches = 0
+        for offset in range(0, len(df), batch_size):
+            try:
+                self.cursor.executemany(query, parameter_rows(df.iloc[offset:offset + batch_size]))
+                self.conn.commit()
+            except self.error as e:
+                self.conn.rollback()
+                raise Exception(
+                    f"Bulk insert into {table} failed in rows {offset}-"
+                    f"{min(offset + batch_size, len(df)) - 1}: {str(e)}"
+                )
+            batches += 1
+        seconds = time.perf_counter() - started
+        return {
+            'rows': len(df),
+            'batches': batches,
+            'seconds': seconds,
+            'rows_per_second': len(df) / seconds if seconds > 0 else 0.0
+        }
+    
+    def bulk_upsert(self, table: str, df: pd.DataFrame,
+                    keys: Sequence[str] = upsert.SHIFT_KEYS,
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    scope: Optional[pd.Series] = None) -> Dict[str, float]:
+        """
+        Insert new rows and update changed ones, so reloading a period is safe.
+        
+        Rows are bulk-loaded into a session staging table, then applied with
+        one MERGE (INSERT ... ON CONFLICT on SQLite) that leaves rows whose
+        values are unchanged untouched. Later duplicates of a key win. Rows
+        with a NULL key are skipped, since NULLs never match and such rows
+        would be inserted again on every rerun. Empty input without a scope
+        writes nothing.
+        
+        Args:
+            table: Destination table; its columns are named after df's
+            df: Rows to upsert
+            keys: Columns identifying a row
+            batch_size: Rows per staging batch
+            scope: Optional values of the column named scope.name; stored rows
+                with one of these values that df no longer contains are deleted,
+                so df must hold every current row in the scope
+        
+        Returns:
+            Dictionary with rows, changed (rows inserted or updated), deleted,
+            skipped (rows with a NULL key), staging rows_per_second and total
+            seconds
+        """
+        upsert.check_dialect(self.dialect)
+        if df.empty and scope is None:
+            # An empty scrape has no columns, so there are no keys to check
+            return {
+                'rows': 0, 'changed': 0, 'deleted': 0, 'skipped': 0,
+                'rows_per_second': 0.0, 'seconds': 0.0
+            }
+        missing = [key for key in keys if key not in df.columns]
+        if missing:
+            raise ValueError(f"Upsert keys {missing} are not columns of the rows")
+        keyed = df[list(keys)].notna().all(axis=1)
+        rows = df[keyed].drop_duplicates(list(keys), keep='last')
+        columns = list(rows.columns)
+        stages = [upsert.staging_table(self.dialect, table)]
+        
+        started = time.perf_counter()
+        for statement in upsert.create_staging_sql(self.dialect, table, columns):
+            self.execute_query(statement)
+        if scope is not None:
+            stages.append(upsert.scope_table(self.dialect, table))
+            for statement in upsert.create_staging_sql(
+                self.dialect, table, [scope.name], stage=stages[1]
+            ):
+                self.execute_query(statement)
+        self.conn.commit()
+        try:
+            staged = self.bulk_insert(stages[0], rows, batch_size)
+            if scope is not None:
+                self.bulk_insert(
+                    stages[1], scope.dropna().drop_duplicates().to_frame(), batch_size
+                )
+            try:
+                deleted = 0
+                if scope is not None:
+                    deleted = self.execute_query(upsert.delete_missing_sql(
+                        self.dialect, table, list(keys), scope.name
+                    )).rowcount
+                changed = self.execute_query(
+                    upsert.merge_sql(self.dialect, table, columns, list(keys))
+                ).rowcount
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        finally:
+            for stage in stages:
+                self.execute_query(upsert.drop_staging_sql(self.dialect, table, stage))
+            self.conn.commit()
+        return {
+            'rows': len(rows),
+            'changed': changed,
+            'deleted': deleted,
+            'skipped': int((~keyed).sum()),
+            'rows_per_second': staged['rows_per_second'],
+            'seconds': time.perf_counter() - started
+        }
+    
     def __enter__(self):
         """Context manager entry."""
         self.connect()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit."""
-        self.disconnect()
\ No newline at end of file
+        """Context manager exit; broken connections are not returned to the pool."""
+        # execute_query re-raises driver errors, so also check the original error
+        cause = getattr(exc_val, '__context__', None)
+        self.disconnect(discard=isinstance(exc_val, self.connection_errors)
+                        or isinstance(cause, self.connection_errors))
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Database connection pooling for ED Physician Compensation System.
+"""
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+HEALTH_CHECK_QUERY = 'SELECT 1'
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable DB-API connections."""
+    
+    def __init__(self, factory: Callable[[], Any], min_size: int = 1, max_size: int = 5,
+                 max_idle_seconds: float = 300.0, health_check_interval: float = 30.0,
+                 checkout_timeout: float = 30.0):
+        """
+        Initialize pool.
+        
+        Args:
+            factory: Callable opening a new DB-API connection, e.g. pyodbc or sqlite3
+            min_size: Connections kept open even when idle
+            max_size: Most connections open at once; further checkouts wait
+            max_idle_seconds: Idle connections beyond min_size are closed after this
+            health_check_interval: Connections idle longer than this are checked
+                with a trivial query before reuse
+            checkout_timeout: Seconds to wait for a free connection
+        """
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        
+        self._idle: List[Tuple[Any, float]] = []
+        self._open = 0
+        self._lock = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0, 'evicted': 0}
+        
+        for _ in range(min_size):
+            self._idle.append((self._create(), time.monotonic()))
+    
+    def _checkout(self, deadline: float) -> Tuple[Optional[Any], bool]:
+        """
+        Take an idle connection or reserve a slot for a new one, waiting if full.
+        
+        Returns:
+            (connection, needs_health_check), or (None, False) for a reserved slot
+        """
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise ConnectionError("Connection pool is closed")
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    # Reuse the most recently returned connection
+                    connection, returned_at = self._idle.pop()
+                    return connection, now - returned_at > self.health_check_interval
+                if self._open < self.max_size:
+                    self._open += 1
+                    return None, False
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise ConnectionError(
+                        f"Timed out waiting for one of {self.max_size} pooled connections"
+                    )
+                self._lock.wait(remaining)
+    
+    def _create(self) -> Any:
+        connection = self.factory()
+        self._open += 1
+        self.stats['created'] += 1
+        return connection
+    
+    def _discard(self, connection: Any) -> None:
+        self._open -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    def _healthy(self, connection: Any) -> bool:
+        """Run the health check query; any error marks the connection dead."""
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(HEALTH_CHECK_QUERY)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    def _evict_idle(self, now: float) -> None:
+        """Close the longest-idle connections beyond min_size. Caller holds the lock."""
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle_seconds:
+            connection, _ = self._idle.pop(0)
+            self._discard(connection)
+            self.stats['evicted'] += 1
+    
+    def acquire(self) -> Any:
+        """
+        Check out a connection for the calling thread.
+        
+        A thread that already holds a connection gets the same one back, so
+        nested checkouts share a connection and its transaction.
+        
+        Returns:
+            Open DB-API connection
+        """
+        held = getattr(self._local, 'connection', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+        
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            connection, check = self._checkout(deadline)
+            if connection is None:
+                # A slot was reserved; log in outside the lock
+                try:
+                    connection = self.factory()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self.stats['created'] += 1
+                break
+            if not check or self._healthy(connection):
+                with self._lock:
+                    self.stats['reused'] += 1
+                break
+            with self._lock:
+                self._discard(connection)
+                self.stats['discarded'] += 1
+                self._lock.notify()
+        
+        self._local.connection = connection
+        self._local.depth = 1
+        return connection
+    
+    def release(self, connection: Any, discard: bool = False) -> None:
+        """
+        Return the calling thread's connection once its outermost checkout ends.
+        
+        Uncommitted work is rolled back so the next user starts clean.
+        
+        Args:
+            connection: Connection returned by acquire
+            discard: Close the connection instead of reusing it, e.g. after
+                a connection-level error
+        """
+        if getattr(self._local, 'connection', None) is not connection:
+            raise ValueError("Connection was not checked out by this thread")
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.connection = None
+        
+        if not discard:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+        
+        with self._lock:
+            if discard or self._closed:
+                self._discard(connection)
+                self.stats['discarded'] += 1
+            else:
+                now = time.monotonic()
+                self._idle.append((connection, now))
+                self._evict_idle(now)
+            self._lock.notify()
+    
+    def close(self) -> None:
+        """Close idle connections; checked-out ones close when released."""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+            self._lock.notify_all()
+    
+    def __len__(self) -> int:
+        """Number of open connections, idle or checked out."""
+        return self._open
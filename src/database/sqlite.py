@@ -0,0 +1,43 @@
+"""
+SQLite stand-in for the database module of ED Physician Compensation System.
+
+Runs the same reads and bulk writes as DatabaseConnection against a local
+SQLite file, for development and checks without SQL Server.
+"""
+import sqlite3
+from typing import Any, Optional, Sequence
+
+from database.connection import DEFAULT_BATCH_SIZE, DatabaseConnection
+from database.pool import ConnectionPool
+
+
+class SQLiteConnection(DatabaseConnection):
+    """DatabaseConnection backed by a SQLite database."""
+    
+    error = sqlite3.Error
+    connection_errors = (sqlite3.InterfaceError,)
+    dialect = 'sqlite'
+    
+    def __init__(self, path: str = ':memory:', pool: Optional[ConnectionPool] = None):
+        """
+        Initialize SQLite connection.
+        
+        Args:
+            path: Database file, or ':memory:' for an in-memory database that
+                lasts one connection
+            pool: Optional pool of sqlite3 connections to the same file
+        """
+        super().__init__(pool=pool)
+        self.path = path
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open a new sqlite3 connection."""
+        return sqlite3.connect(self.path)
+    
+    def read_arrow(self, query: str, params: Sequence[Any] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, reader: str = 'cursor') -> Any:
+        """Read a result set into an Arrow table; arrow-odbc cannot reach SQLite."""
+        if reader != 'cursor':
+            # The other readers would query the SQL Server named by the DB_* settings
+            raise ValueError(f"SQLite supports only the 'cursor' reader, not '{reader}'")
+        return super().read_arrow(query, params, batch_size, reader)
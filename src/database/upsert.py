@@ -0,0 +1,133 @@
+"""
+Set-based upserts for the database module of ED Physician Compensation System.
+
+Rows are bulk-loaded into a session staging table, then applied to the
+target by one statement that inserts new keys and updates only the rows
+whose other values changed, so a rerun writes only what differs. Stored
+rows within a scope, e.g. the shifts of the processed period, that the new
+rows no longer contain are deleted in the same transaction.
+"""
+from typing import List, Optional, Sequence
+
+# Natural key of scraped schedule rows
+SHIFT_KEYS = ('date', 'physician_id', 'start_time')
+DIALECTS = ('mssql', 'sqlite')
+
+
+def check_dialect(dialect: str) -> None:
+    """Raise ValueError for a dialect without upsert statements."""
+    if dialect not in DIALECTS:
+        raise ValueError(f"Unknown SQL dialect '{dialect}', expected one of {DIALECTS}")
+
+
+def staging_table(dialect: str, table: str) -> str:
+    """Name of the session-private staging table for table."""
+    check_dialect(dialect)
+    return f'#stage_{table}' if dialect == 'mssql' else f'temp.stage_{table}'
+
+
+def scope_table(dialect: str, table: str) -> str:
+    """Name of the session-private table holding the scope of an upsert into table."""
+    return staging_table(dialect, f'{table}_scope')
+
+
+def create_staging_sql(dialect: str, table: str, columns: Sequence[str],
+                       stage: Optional[str] = None) -> List[str]:
+    """
+    Statements (re)creating an empty staging table with table's column types.
+    
+    Args:
+        dialect: 'mssql' or 'sqlite'
+        table: Target table
+        columns: Columns to stage
+        stage: Staging table to create, defaults to staging_table(dialect, table)
+    
+    Returns:
+        List of SQL statements to run in order
+    """
+    stage = stage or staging_table(dialect, table)
+    select = ', '.join(columns)
+    if dialect == 'mssql':
+        create = f"SELECT TOP 0 {select} INTO {stage} FROM {table}"
+    else:
+        create = f"CREATE TABLE {stage} AS SELECT {select} FROM {table} WHERE 0"
+    return [f"DROP TABLE IF EXISTS {stage}", create]
+
+
+def merge_sql(dialect: str, table: str, columns: Sequence[str], keys: Sequence[str]) -> str:
+    """
+    Statement applying the staging table to table.
+    
+    New keys are inserted; existing keys are updated only when a non-key
+    value differs, with NULLs compared as equal to each other.
+    
+    Args:
+        dialect: 'mssql' or 'sqlite'
+        table: Target table; SQLite needs a unique index on keys
+        columns: Staged columns
+        keys: Columns identifying a row
+    
+    Returns:
+        SQL statement
+    """
+    stage = staging_table(dialect, table)
+    values = [column for column in columns if column not in keys]
+    column_list = ', '.join(columns)
+    
+    if dialect == 'mssql':
+        match = ' AND '.join(f"target.{key} = source.{key}" for key in keys)
+        statement = f"MERGE {table} AS target USING {stage} AS source ON {match}"
+        if values:
+            # EXCEPT treats NULLs as equal, unlike <>
+            changed = (
+                f"EXISTS (SELECT {', '.join(f'source.{column}' for column in values)} "
+                f"EXCEPT SELECT {', '.join(f'target.{column}' for column in values)})"
+            )
+            updates = ', '.join(f"{column} = source.{column}" for column in values)
+            statement += f" WHEN MATCHED AND {changed} THEN UPDATE SET {updates}"
+        inserts = ', '.join(f"source.{column}" for column in columns)
+        return (
+            f"{statement} WHEN NOT MATCHED BY TARGET THEN "
+            f"INSERT ({column_list}) VALUES ({inserts});"
+        )
+    
+    # WHERE true keeps SQLite from parsing ON CONFLICT as a join constraint
+    statement = (
+        f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} WHERE true "
+        f"ON CONFLICT ({', '.join(keys)}) DO "
+    )
+    if not values:
+        return statement + "NOTHING"
+    updates = ', '.join(f"{column} = excluded.{column}" for column in values)
+    changed = ' OR '.join(f"{table}.{column} IS NOT excluded.{column}" for column in values)
+    return statement + f"UPDATE SET {updates} WHERE {changed}"
+
+
+def delete_missing_sql(dialect: str, table: str, keys: Sequence[str], column: str) -> str:
+    """
+    Statement deleting stored rows in scope that the staging table lacks.
+
+    Run before merge_sql in the same transaction, it has the effect of a
+    MERGE ... WHEN NOT MATCHED BY SOURCE THEN DELETE limited to the scope.
+    
+    Args:
+        dialect: 'mssql' or 'sqlite'
+        table: Target table
+        keys: Columns identifying a row
+        column: Column whose values in the scope table select the rows to check
+        
+    Returns:
+        SQL statement
+    """
+    stage = staging_table(dialect, table)
+    match = ' AND '.join(f"source.{key} = {table}.{key}" for key in keys)
+    return (
+        f"DELETE FROM {table} WHERE {column} IN "
+        f"(SELECT {column} FROM {scope_table(dialect, table)}) "
+        f"AND NOT EXISTS (SELECT 1 FROM {stage} AS source WHERE {match})"
+    )
+
+
+def drop_staging_sql(dialect: str, table: str, stage: Optional[str] = None) -> str:
+    """Statement dropping the staging table, or another session table such as the scope."""
+    return f"DROP TABLE IF EXISTS {stage or staging_table(dialect, table)}"
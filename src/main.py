@@ -4,14 +4,21 @@ Main entry point for ED Physician Compensation System.
 import logging
 import os
 from datetime import datetime, timedelta
+from typing import Optional
 
 import pandas as pd
 from dotenv import load_dotenv
 
-from database.connection import DatabaseConnection
+from database.connection import DatabaseConnection, shared_pool
 from scraper.amion_scraper import AmionScraper
+from validation.incremental import IncrementalValidator
 from validation.shift_validator import ShiftValidator
 from compensation.calculator import CompensationCalculator
+from compensation.differentials import DifferentialPolicy
+from compensation.incremental import IncrementalCompensation
+from compensation.parallel import ParallelCompensation
+from parameters.store import ParameterStore
+from utils.timestamps import normalize_shift_times
 
 # Configure logging
 logging.basicConfig(
@@ -25,9 +32,42 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def load_compensation_parameters():
-    """Load compensation parameters from configuration."""
-    # TODO: Load from database or config file
+# Natural keys of stored rows, so reprocessing a period updates them in place;
+# a shift can have several issues of one type, e.g. overlaps on either side,
+# so issues are identified by their description and replaced when it changes
+ISSUE_KEYS = ('shift_id', 'issue_type', 'description')
+RESULT_KEYS = ('physician_id', 'period_start', 'period_end')
+
+def log_upsert(table: str, stats: dict) -> None:
+    """Log the row counts and staging throughput of a bulk upsert."""
+    logger.info(
+        f"Upserted {stats['rows']} rows into {table}, {stats['changed']} inserted or changed, "
+        f"{stats['deleted']} deleted ({stats['rows_per_second']:.0f} rows/s staged)"
+    )
+    if stats['skipped']:
+        # e.g. missing_actual_shift issues, which no stored shift_id identifies
+        logger.warning(
+            f"Skipped {stats['skipped']} rows for {table} with no value in a key column"
+        )
+
+def read_query(db: DatabaseConnection, query: str, params: tuple,
+               arrow_reader: Optional[str] = None) -> pd.DataFrame:
+    """Read a query into a DataFrame, through Arrow only when a reader is configured."""
+    if arrow_reader:
+        return db.read_arrow(query, params, reader=arrow_reader).to_pandas()
+    return db.read_dataframe(query, params)
+
+def load_compensation_parameters(as_of: datetime):
+    """Load compensation parameters from configuration for a run ending at as_of."""
+    parameters_path = os.getenv('COMPENSATION_PARAMETERS')
+    if parameters_path:
+        # Effective-dated versions; the version by the period end acts as the
+        # calculator defaults, so reruns of fully covered past periods work
+        store = ParameterStore.from_csv(parameters_path)
+        params = store.defaults_at(as_of)
+        params['parameter_store'] = store
+        return params
+    
     return {
         'base_rate': 200.0,  # Base hourly rate
         'shift_differentials': {
@@ -39,23 +79,59 @@ def load_compensation_parameters():
         'performance_threshold': 90.0  # Minimum productivity percentage for performance bonus
     }
 
-def process_shift_data(start_date: datetime, end_date: datetime):
+def load_holiday_calendar():
+    """Load holiday dates from the file named by HOLIDAY_CALENDAR, one ISO date per line."""
+    path = os.getenv('HOLIDAY_CALENDAR')
+    if not path:
+        return []
+    with open(path) as calendar_file:
+        return [
+            datetime.strptime(line.strip(), '%Y-%m-%d').date()
+            for line in calendar_file if line.strip()
+        ]
+
+def process_shift_data(start_date: datetime, end_date: datetime,
+                       validation_store: Optional[str] = None,
+                       compensation_store: Optional[str] = None,
+                       compensation_workers: Optional[int] = None,
+                       arrow_reader: Optional[str] = None):
     """
     Process shift data for the specified date range.
     
     Args:
         start_date: Start date for processing
         end_date: End date for processing
+        validation_store: Optional local store path; when given, only shifts
+            changed since the previous run are re-validated
+        compensation_store: Optional local store path; when given, only
+            physician-periods whose shifts or billing changed are recalculated
+        compensation_workers: Optional process count; when greater than one,
+            physicians are split across a process pool for a full calculation;
+            cannot be combined with compensation_store, which raises ValueError
+        arrow_reader: Optional read_arrow reader for the shifts and billing
+            queries, e.g. 'arrow-odbc' to read natively over an extra unpooled
+            connection per query; by default they are read into DataFrames
+            through the pooled connection
     """
+    if compensation_store and compensation_workers and compensation_workers > 1:
+        raise ValueError(
+            "compensation_store and compensation_workers above one cannot be combined; "
+            "incremental compensation runs in a single process"
+        )
+    
     try:
         logger.info(f"Starting shift data processing for {start_date} to {end_date}")
         
         # Initialize components
-        db = DatabaseConnection()
+        db = DatabaseConnection(pool=shared_pool())
         scraper = AmionScraper()
         validator = ShiftValidator()
-        comp_params = load_compensation_parameters()
-        calculator = CompensationCalculator(**comp_params)
+        comp_params = load_compensation_parameters(end_date)
+        differential_policy = DifferentialPolicy(
+            comp_params['shift_differentials'],
+            holidays=load_holiday_calendar()
+        )
+        calculator = CompensationCalculator(**comp_params, differential_policy=differential_policy)
         
         # Scrape Amion schedule
         logger.info("Fetching Amion schedule data...")
@@ -65,7 +141,7 @@ def process_shift_data(start_date: datetime, end_date: datetime):
         with db:
             # Store scraped data
             logger.info("Storing scraped schedule data...")
-            # TODO: Implement database storage
+            log_upsert('scheduled_shifts', db.bulk_upsert('scheduled_shifts', scheduled_shifts_df))
             
             # Retrieve actual shift data
             logger.info("Retrieving actual shift data...")
@@ -74,11 +150,7 @@ def process_shift_data(start_date: datetime, end_date: datetime):
                 FROM shifts
                 WHERE start_time BETWEEN ? AND ?
             """
-            actual_shifts = db.execute_query(
-                actual_shifts_query, 
-                {'start_date': start_date, 'end_date': end_date}
-            )
-            actual_shifts_df = pd.DataFrame(actual_shifts.fetchall())
+            actual_shifts_df = read_query(db, actual_shifts_query, (start_date, end_date), arrow_reader)
             
             # Retrieve wRVU data
             logger.info("Retrieving wRVU billing data...")
@@ -88,27 +160,49 @@ def process_shift_data(start_date: datetime, end_date: datetime):
                 WHERE service_date BETWEEN ? AND ?
                 GROUP BY shift_id, physician_id
             """
-            wrvu_data = db.execute_query(
-                wrvu_query,
-                {'start_date': start_date, 'end_date': end_date}
-            )
-            wrvu_df = pd.DataFrame(wrvu_data.fetchall())
+            wrvu_df = read_query(db, wrvu_query, (start_date, end_date), arrow_reader)
+        
+        # Normalize shift timestamps once for validation and compensation
+        site_timezone = os.getenv('SITE_TIMEZONE', 'UTC')
+        actual_shifts_df = normalize_shift_times(actual_shifts_df, site_timezone)
+        scheduled_shifts_df = normalize_shift_times(
+            scheduled_shifts_df, site_timezone, time_format='ISO8601'
+        )
         
         # Validate shifts
         logger.info("Validating shift data...")
-        validation_issues = validator.validate_all(actual_shifts_df, scheduled_shifts_df)
+        if validation_store:
+            validation_issues = IncrementalValidator(validator, validation_store).validate_all(
+                actual_shifts_df, scheduled_shifts_df
+            )
+        else:
+            validation_issues = validator.validate_all(actual_shifts_df, scheduled_shifts_df)
         
         if not validation_issues.empty:
             logger.warning(f"Found {len(validation_issues)} validation issues")
-            # TODO: Store validation issues in database
+        # Stored issues of this period's shifts that were resolved are removed
+        with db:
+            log_upsert('validation_issues', db.bulk_upsert(
+                'validation_issues', validation_issues, keys=ISSUE_KEYS,
+                scope=actual_shifts_df['shift_id']
+            ))
         
         # Calculate compensation
         logger.info("Calculating compensation...")
-        compensation_data = calculator.calculate_total_compensation(
-            actual_shifts_df,
-            wrvu_df,
-            evaluation_period='M'
-        )
+        if compensation_store:
+            compensation_data = IncrementalCompensation(
+                calculator, compensation_store, evaluation_period='M'
+            ).calculate_total_compensation(actual_shifts_df, wrvu_df)
+        elif compensation_workers and compensation_workers > 1:
+            compensation_data = ParallelCompensation(
+                calculator, max_workers=compensation_workers
+            ).calculate_total_compensation(actual_shifts_df, wrvu_df, evaluation_period='M')
+        else:
+            compensation_data = calculator.calculate_total_compensation(
+                actual_shifts_df,
+                wrvu_df,
+                evaluation_period='M'
+            )
         
         # Generate report
         logger.info("Generating compensation report...")
@@ -118,7 +212,15 @@ def process_shift_data(start_date: datetime, end_date: datetime):
             end_date
         )
         
-        # TODO: Store compensation results
+        # Store compensation results
+        logger.info("Storing compensation results...")
+        with db:
+            log_upsert('compensation_results', db.bulk_upsert(
+                'compensation_results',
+                report.assign(period_start=start_date, period_end=end_date),
+                keys=RESULT_KEYS
+            ))
+        
         logger.info("Processing completed successfully")
         return report
         
@@ -137,8 +239,14 @@ def main():
     end_date = datetime(today.year, today.month, 1) - timedelta(days=1)
     
     try:
-        report = process_shift_data(start_date, end_date)
-        # TODO: Save report to file or database
+        report = process_shift_data(
+            start_date, end_date,
+            validation_store=os.getenv('VALIDATION_STORE'),
+            compensation_store=os.getenv('COMPENSATION_STORE'),
+            compensation_workers=int(os.getenv('COMPENSATION_WORKERS', '1')),
+            arrow_reader=os.getenv('DB_ARROW_READER')
+        )
+        # TODO: Export report to a file; it is already upserted into compensation_results
         logger.info("Compensation processing completed successfully")
         
     except Exception as e:
@@ -0,0 +1,214 @@
+"""
+Effective-dated compensation parameter store for ED Physician Compensation System.
+
+Each row of the store is a parameter version valid from effective_from
+(inclusive) to effective_to (exclusive; when empty, until the next version
+or open-ended), so retro-pay reruns use the rates that were in effect when
+a shift was worked.
+"""
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.timestamps import ensure_datetime
+
+DIFFERENTIAL_PREFIX = 'differential_'
+SCALAR_COLUMNS = ['base_rate', 'wrvu_target', 'performance_threshold']
+
+# Loaded stores keyed by source, reused across runs in the same process
+_FILE_CACHE: Dict[Tuple[str, int, int], 'ParameterStore'] = {}
+_QUERY_CACHE: Dict[str, Tuple[float, 'ParameterStore']] = {}
+
+
+class ParameterStore:
+    """Versioned compensation parameters with effective date ranges."""
+    
+    def __init__(self, versions: pd.DataFrame):
+        """
+        Initialize store from version rows.
+        
+        Args:
+            versions: DataFrame with effective_from, effective_to, base_rate,
+                wrvu_target, performance_threshold and differential_<shift type>
+                columns
+        """
+        missing = [column for column in ['effective_from'] + SCALAR_COLUMNS
+                   if column not in versions.columns]
+        if missing:
+            raise ValueError(f"Parameter versions are missing columns: {missing}")
+        
+        versions = versions.copy()
+        versions['effective_from'] = pd.to_datetime(versions['effective_from']).dt.as_unit('ns')
+        versions['effective_to'] = pd.to_datetime(
+            versions.get('effective_to', pd.Series(pd.NaT, index=versions.index))
+        ).dt.as_unit('ns')
+        versions = versions.sort_values('effective_from', kind='mergesort').reset_index(drop=True)
+        
+        # An open-ended version runs until the next one takes effect
+        next_from = versions['effective_from'].shift(-1)
+        versions['effective_to'] = versions['effective_to'].fillna(next_from)
+        if (versions['effective_to'] > next_from).any():
+            raise ValueError(
+                "Parameter versions overlap: effective_to must not pass the next effective_from"
+            )
+        self.versions = versions
+    
+    @classmethod
+    def from_csv(cls, path: str) -> 'ParameterStore':
+        """
+        Load versions from a CSV file, reusing the parsed store until the file changes.
+        
+        Args:
+            path: CSV file of parameter versions
+            
+        Returns:
+            ParameterStore for the file
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if key not in _FILE_CACHE:
+            _FILE_CACHE[key] = cls(pd.read_csv(path))
+        return _FILE_CACHE[key]
+    
+    @classmethod
+    def from_database(cls, db, table: str = 'compensation_parameters',
+                      ttl_seconds: float = 300.0) -> 'ParameterStore':
+        """
+        Load versions from a database table, cached for ttl_seconds.
+        
+        Args:
+            db: Connected DatabaseConnection
+            table: Table holding parameter versions
+            ttl_seconds: How long a loaded store is reused
+            
+        Returns:
+            ParameterStore for the table
+        """
+        cached = _QUERY_CACHE.get(table)
+        if cached is not None and time.monotonic() - cached[0] < ttl_seconds:
+            return cached[1]
+        
+        store = cls(db.read_dataframe(f"SELECT * FROM {table}"))
+        _QUERY_CACHE[table] = (time.monotonic(), store)
+        return store
+    
+    @property
+    def shift_types(self) -> List[str]:
+        """Shift types that have a differential column."""
+        return [column[len(DIFFERENTIAL_PREFIX):] for column in self.versions.columns
+                if column.startswith(DIFFERENTIAL_PREFIX)]
+    
+    def version_at(self, when: datetime) -> Dict[str, Any]:
+        """
+        Return calculator parameters in effect at a point in time.
+        
+        Args:
+            when: Point in time to look up
+            
+        Returns:
+            Dictionary of CompensationCalculator keyword arguments
+        """
+        when = pd.Timestamp(when)
+        effective = self.versions[
+            (self.versions['effective_from'] <= when)
+            & (self.versions['effective_to'].isna() | (self.versions['effective_to'] > when))
+        ]
+        if effective.empty:
+            raise LookupError(f"No compensation parameters in effect at {when}")
+        return self._params(effective.index[-1])
+    
+    def defaults_at(self, when: datetime) -> Dict[str, Any]:
+        """
+        Return calculator defaults for a run ending at a point in time.
+        
+        Unlike version_at this never fails: it takes the latest version that
+        took effect by then, even if it has since expired, or else the first.
+        Shifts are still priced by the version attached to each of them.
+        
+        Args:
+            when: End of the processed period
+            
+        Returns:
+            Dictionary of CompensationCalculator keyword arguments
+        """
+        started = self.versions.index[self.versions['effective_from'] <= pd.Timestamp(when)]
+        return self._params(started[-1] if len(started) else self.versions.index[0])
+    
+    def _params(self, version: int) -> Dict[str, Any]:
+        """Calculator keyword arguments of one version."""
+        params = {column: float(self.versions.at[version, column]) for column in SCALAR_COLUMNS}
+        params['shift_differentials'] = self.differentials(version)
+        return params
+    
+    def differentials(self, version: int) -> Dict[str, float]:
+        """
+        Return the shift differentials of one version.
+        
+        Args:
+            version: Position of the version in self.versions
+            
+        Returns:
+            Dictionary mapping shift types to differential rates
+        """
+        row = self.versions.iloc[version]
+        return {
+            shift_type: float(row[DIFFERENTIAL_PREFIX + shift_type])
+            for shift_type in self.shift_types
+            if pd.notna(row[DIFFERENTIAL_PREFIX + shift_type])
+        }
+    
+    def attach(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Attach the parameter version in effect to every shift.
+        
+        Versions are matched to shift start times with a single sorted as-of
+        join rather than a lookup per shift. Naive effective dates are read
+        in the shifts' timezone.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            
+        Returns:
+            Copy of the data with param_version (-1 when the start time is
+            missing) and param_<name> columns for each versioned parameter
+        """
+        start_time = ensure_datetime(shifts_df['start_time']).dt.as_unit('ns')
+        versions = self.versions[['effective_from', 'effective_to']].copy()
+        if start_time.dt.tz is not None:
+            for column in ['effective_from', 'effective_to']:
+                versions[column] = versions[column].dt.tz_localize(start_time.dt.tz)
+        versions['param_version'] = np.arange(len(versions))
+        
+        starts = pd.DataFrame({'row': np.arange(len(shifts_df)), 'start_time': start_time.to_numpy()})
+        starts = starts[start_time.notna().to_numpy()].sort_values('start_time', kind='mergesort')
+        matched = pd.merge_asof(
+            starts,
+            versions,
+            left_on='start_time',
+            right_on='effective_from',
+            direction='backward'
+        )
+        expired = matched['effective_to'].notna() & (matched['start_time'] >= matched['effective_to'])
+        uncovered = matched['param_version'].isna() | expired
+        if uncovered.any():
+            raise LookupError(
+                f"{int(uncovered.sum())} shifts have no compensation parameters in effect, "
+                f"first at {matched.loc[uncovered, 'start_time'].iloc[0]}"
+            )
+        
+        version = np.full(len(shifts_df), -1)
+        version[matched['row'].to_numpy()] = matched['param_version'].to_numpy(dtype=int)
+        
+        attached = shifts_df.copy()
+        attached['param_version'] = version
+        parameter_columns = SCALAR_COLUMNS + [
+            DIFFERENTIAL_PREFIX + shift_type for shift_type in self.shift_types
+        ]
+        for column in parameter_columns:
+            values = self.versions[column].to_numpy(dtype=float)
+            attached[f'param_{column}'] = np.where(version >= 0, values[version], np.nan)
+        return attached
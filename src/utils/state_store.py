@@ -0,0 +1,60 @@
+"""
+Local run-state store for ED Physician Compensation System.
+
+Incremental validation and compensation keep the previous run's per-shift
+content hashes and outputs in a pickle file, and compare the current data's
+hashes against it to find what changed.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def load_state(store_path: str) -> Optional[Dict[str, Any]]:
+    """Load the previous run's state, or None when no run is stored."""
+    if not os.path.exists(store_path):
+        return None
+    return pd.read_pickle(store_path)
+
+
+def save_state(store_path: str, state: Dict[str, Any]) -> None:
+    """Atomically replace the stored state."""
+    temp_path = f"{store_path}.tmp"
+    pd.to_pickle(state, temp_path)
+    os.replace(temp_path, store_path)
+
+
+def check_shift_ids(shifts_df: pd.DataFrame, purpose: str) -> None:
+    """Raise ValueError unless shifts_df has unique shift_id values."""
+    if 'shift_id' not in shifts_df.columns or not shifts_df['shift_id'].is_unique:
+        raise ValueError(f"{purpose} requires unique shift_id values")
+
+
+def row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Hash each row's content, independent of column order.
+    
+    Args:
+        frame: DataFrame to hash
+        
+    Returns:
+        uint64 array with one hash per row
+    """
+    return pd.util.hash_pandas_object(frame[sorted(frame.columns)], index=False).to_numpy()
+
+
+def changed_shifts(snapshot: pd.DataFrame, previous: pd.DataFrame) -> pd.Series:
+    """
+    Flag shifts that are new or whose hash differs from the stored one.
+    
+    Args:
+        snapshot: Current shift_id and row_hash columns
+        previous: Stored shift_id and row_hash columns
+        
+    Returns:
+        Boolean Series aligned with snapshot
+    """
+    previous_hash = previous.set_index('shift_id')['row_hash']
+    return snapshot['row_hash'] != snapshot['shift_id'].map(previous_hash)
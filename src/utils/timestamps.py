@@ -0,0 +1,95 @@
+"""
+Timestamp normalization for ED Physician Compensation System.
+
+Shift times are normalized once at ingest so downstream validation and
+compensation code can rely on typed, timezone-aware columns instead of
+parsing strings again.
+"""
+from datetime import datetime
+from typing import Optional, Sequence, Union
+
+import pandas as pd
+
+DEFAULT_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+SHIFT_TIME_COLUMNS = ('start_time', 'end_time')
+# Ticks per second of each datetime time unit, to turn integer durations into seconds
+UNITS_PER_SECOND = {'ns': 1e9, 'us': 1e6, 'ms': 1e3}
+
+
+def ensure_datetime(values: pd.Series) -> pd.Series:
+    """Parse a timestamp column, leaving already-typed columns untouched."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values)
+
+
+def normalize_timestamps(values: pd.Series, tz: str,
+                         time_format: Optional[str] = DEFAULT_TIME_FORMAT,
+                         ambiguous: Union[bool, str] = False) -> pd.Series:
+    """
+    Convert a column to timezone-aware datetime64[ns].
+    
+    Args:
+        values: Strings, datetime objects or an already-typed column
+        tz: Site timezone that naive wall-clock times are recorded in
+        time_format: Explicit strptime format for string columns
+        ambiguous: How to resolve wall-clock times repeated when DST ends;
+            False treats them as standard time
+        
+    Returns:
+        Series of dtype datetime64[ns, tz]
+    """
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format=time_format)
+    values = values.dt.as_unit('ns')
+    if values.dt.tz is None:
+        return values.dt.tz_localize(tz, ambiguous=ambiguous, nonexistent='shift_forward')
+    return values.dt.tz_convert(tz)
+
+
+def normalize_shift_times(shifts_df: pd.DataFrame, tz: str,
+                          time_format: Optional[str] = DEFAULT_TIME_FORMAT,
+                          columns: Sequence[str] = SHIFT_TIME_COLUMNS) -> pd.DataFrame:
+    """
+    Normalize shift timestamp columns and precompute shift hours.
+    
+    Args:
+        shifts_df: DataFrame containing shift data
+        tz: Site timezone that naive wall-clock times are recorded in
+        time_format: Explicit strptime format for string columns
+        columns: Timestamp columns to normalize
+        
+    Returns:
+        Copy of the data with typed timestamp columns and a shift_hours column
+        holding elapsed hours, which is correct across DST changes
+    """
+    normalized = shifts_df.copy()
+    for column in columns:
+        if column in normalized.columns:
+            normalized[column] = normalize_timestamps(normalized[column], tz, time_format)
+    
+    if 'start_time' in normalized.columns and 'end_time' in normalized.columns:
+        normalized['shift_hours'] = (
+            normalized['end_time'] - normalized['start_time']
+        ).dt.total_seconds() / 3600
+    return normalized
+
+
+def localize_like(value: datetime, reference: pd.Series) -> pd.Timestamp:
+    """
+    Make a bound comparable with a timestamp column.
+    
+    Args:
+        value: Naive or aware datetime, e.g. a report start date
+        reference: Timestamp column the bound is compared against
+        
+    Returns:
+        Timestamp in the column's timezone, or naive for naive columns
+    """
+    value = pd.Timestamp(value)
+    tz = getattr(reference.dt, 'tz', None)
+    if tz is None:
+        return value.tz_localize(None) if value.tz is not None else value
+    if value.tz is None:
+        return value.tz_localize(tz)
+    return value.tz_convert(tz)
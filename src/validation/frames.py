@@ -0,0 +1,82 @@
+"""
+Shared DataFrame helpers for the validation module.
+"""
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.timestamps import ensure_datetime
+
+ISSUE_COLUMNS = ['shift_id', 'issue_type', 'description']
+
+
+def column_or_none(df: pd.DataFrame, column: str) -> pd.Series:
+    """Return a column, or a column of None when it is absent."""
+    if column in df.columns:
+        return df[column]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def physician_timeline(shifts_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse shift times once and sort by physician and start time.
+    
+    Args:
+        shifts_df: DataFrame containing shift data
+        
+    Returns:
+        DataFrame with shift_id, physician_id, parsed start/end times and the
+        source row position, sorted by (physician_id, start_time)
+    """
+    timeline = pd.DataFrame({
+        'shift_id': column_or_none(shifts_df, 'shift_id'),
+        'physician_id': shifts_df['physician_id'],
+        'start_time': ensure_datetime(shifts_df['start_time']),
+        'end_time': ensure_datetime(shifts_df['end_time']),
+        'source_row': np.arange(len(shifts_df))
+    })
+    timeline = timeline.sort_values(['physician_id', 'start_time'], kind='mergesort')
+    return timeline.reset_index(drop=True)
+
+
+def epoch_ns(timestamps: pd.Series) -> np.ndarray:
+    """Return parsed timestamps as int64 nanoseconds since the epoch."""
+    return timestamps.dt.as_unit('ns').astype('int64').to_numpy()
+
+
+def issue_frame(shift_ids: pd.Series, issue_type: str, descriptions: pd.Series,
+                order: Tuple[np.ndarray, int], block: int = 0) -> pd.DataFrame:
+    """
+    Build a block of issues for a single issue type.
+    
+    Args:
+        shift_ids: Shift ids of the flagged rows
+        issue_type: Issue type shared by every row in the block
+        descriptions: Description for each flagged row
+        order: Row positions and check rank used to order the output
+        block: Output block; lower blocks are reported first
+        
+    Returns:
+        DataFrame with issue columns plus private ordering columns
+    """
+    positions, rank = order
+    return pd.DataFrame({
+        'shift_id': np.asarray(shift_ids),
+        'issue_type': issue_type,
+        'description': np.asarray(descriptions),
+        '_block': block,
+        '_row': positions,
+        '_rank': rank
+    })
+
+
+def combine_issues(frames: List[pd.DataFrame],
+                   columns: List[str] = ISSUE_COLUMNS) -> pd.DataFrame:
+    """Concatenate issue blocks in block order, then row order, then check order."""
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    issues = pd.concat(frames, ignore_index=True)
+    issues = issues.sort_values(['_block', '_row', '_rank'], kind='mergesort')
+    return issues[columns].reset_index(drop=True)
@@ -0,0 +1,198 @@
+"""
+Incremental shift validation for ED Physician Compensation System.
+"""
+import hashlib
+import marshal
+from typing import Any, Dict
+
+import pandas as pd
+
+from utils.state_store import changed_shifts, check_shift_ids, load_state, row_hashes, save_state
+from validation.frames import ISSUE_COLUMNS, physician_timeline
+from validation.shift_validator import ShiftValidator
+
+
+class IncrementalValidator:
+    """Re-validates only shifts whose content changed since the previous run."""
+    
+    def __init__(self, validator: ShiftValidator, store_path: str):
+        """
+        Initialize incremental validation backed by a local store.
+        
+        Args:
+            validator: Validator whose rules are applied
+            store_path: File holding per-shift content hashes and the last issues
+        """
+        self.validator = validator
+        self.store_path = store_path
+    
+    def settings(self) -> Dict[str, Any]:
+        """Validator settings and rule definitions; a change forces a full re-validation."""
+        return {
+            **self.validator.settings(),
+            'rules': [
+                (rule.name, rule.issue_type, rule.description, rule.columns, rule.check,
+                 rule.order, _mask_fingerprint(rule.mask))
+                for rule in self.validator.rules
+            ]
+        }
+    
+    def validate_shifts(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Run the registered shift rules, re-checking only what changed.
+        
+        Args:
+            shifts_df: DataFrame containing shift data with unique shift_id values
+            
+        Returns:
+            DataFrame containing validation issues for every current shift
+        """
+        snapshot = _snapshot(shifts_df)
+        settings = self.settings()
+        state = load_state(self.store_path)
+        
+        # Stored issues carry the rule behind each issue so merged results
+        # can be ordered as a full run orders them
+        if (state is None or state['settings'] != settings
+                or 'rule' not in state['issues'].columns):
+            issues = self.validator.run_rules(shifts_df, with_rule=True)
+        else:
+            issues = self._revalidate(shifts_df, snapshot, state)
+        
+        save_state(self.store_path, {'settings': settings, 'shifts': snapshot, 'issues': issues})
+        return issues[ISSUE_COLUMNS]
+    
+    def validate_all(self, actual_shifts: pd.DataFrame,
+                     scheduled_shifts: pd.DataFrame) -> pd.DataFrame:
+        """
+        Incremental counterpart of ShiftValidator.validate_all.
+        
+        Args:
+            actual_shifts: DataFrame containing actual shift data
+            scheduled_shifts: DataFrame containing Amion schedule data
+            
+        Returns:
+            DataFrame containing all validation issues
+        """
+        all_issues = [
+            df for df in [
+                self.validate_shifts(actual_shifts),
+                self.validator.validate_against_amion(actual_shifts, scheduled_shifts)
+            ] if not df.empty
+        ]
+        if all_issues:
+            return pd.concat(all_issues, ignore_index=True)
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    
+    def _revalidate(self, shifts_df: pd.DataFrame, snapshot: pd.DataFrame,
+                    state: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Re-run rules over the changed shifts and their per-physician neighbors.
+        
+        A changed shift can only alter the overlap result of shifts starting
+        inside it or running when it starts, and the early-start result of
+        shifts starting within the preceding-shift gap after it, so the dirty
+        set per physician is the span between the earliest changed start and
+        the latest changed end (old and new versions), plus the gap, plus the
+        shifts still running at the span's start, widened by one neighbor on
+        each side. Rules are evaluated over the dirty shifts extended back far enough
+        to see every shift that could still be running when the first starts.
+        
+        Args:
+            shifts_df: Current shift data
+            snapshot: Hashed timeline of the current shift data
+            state: Stored state from the previous run
+            
+        Returns:
+            DataFrame containing validation issues, with their rule, for
+            every current shift
+        """
+        previous = state['shifts']
+        changed = changed_shifts(snapshot, previous).to_numpy()
+        removed = previous[~previous['shift_id'].isin(snapshot['shift_id'])]
+        
+        columns = ['physician_id', 'start_time', 'end_time']
+        touched = pd.concat([
+            snapshot.loc[changed, columns],
+            previous.loc[previous['shift_id'].isin(snapshot.loc[changed, 'shift_id']), columns],
+            removed[columns]
+        ])
+        if touched.empty:
+            return state['issues']
+        
+        bounds = touched.groupby('physician_id').agg(
+            lo=('start_time', 'min'), hi=('end_time', 'max')
+        )
+        timeline = snapshot.join(bounds, on='physician_id')
+        gap = pd.Timedelta(self.validator.preceding_shift_gap)
+        horizon = (snapshot['end_time'] - snapshot['start_time']).max() + gap
+        
+        physician_id = timeline['physician_id']
+        same_previous = physician_id.eq(physician_id.shift())
+        same_next = physician_id.eq(physician_id.shift(-1))
+        affected = timeline['lo'].notna()
+        
+        dirty = changed | (
+            affected
+            & (timeline['start_time'] >= timeline['lo'])
+            & (timeline['start_time'] <= timeline['hi'] + gap)
+        ) | (
+            affected
+            & (timeline['start_time'] <= timeline['hi'])
+            & (timeline['end_time'] > timeline['lo'])
+        )
+        dirty = (dirty
+                 | (dirty.shift(1, fill_value=False) & same_previous)
+                 | (dirty.shift(-1, fill_value=False) & same_next))
+        
+        # Context: from the first shift that could still be running at the
+        # dirty span's start through one shift past its end
+        position = timeline.groupby('physician_id', sort=False).cumcount()
+        dirty_position = position.where(dirty)
+        first = dirty_position.groupby(physician_id, sort=False).transform('min')
+        last = dirty_position.groupby(physician_id, sort=False).transform('max')
+        first_start = (
+            timeline['start_time'].where(dirty)
+            .groupby(physician_id, sort=False).transform('min')
+        )
+        in_reach = timeline['start_time'] >= first_start - horizon
+        context = affected & (position <= last + 1) & ((position >= first - 1) | in_reach)
+        
+        context_rows = timeline.loc[context, 'source_row'].sort_values().to_numpy()
+        fresh = self.validator.run_rules(shifts_df.iloc[context_rows], with_rule=True)
+        dirty_ids = timeline.loc[dirty, 'shift_id']
+        fresh = fresh[fresh['shift_id'].isin(dirty_ids)]
+        
+        kept = state['issues']
+        kept = kept[~kept['shift_id'].isin(dirty_ids) & ~kept['shift_id'].isin(removed['shift_id'])]
+        
+        # Report issues in the order a full run would
+        issues = pd.concat([kept, fresh], ignore_index=True)
+        return self.validator.rules.sort_issues(issues, snapshot)
+
+
+def _mask_fingerprint(mask) -> str:
+    """Identify a rule mask by its qualified name and, for plain functions, its code."""
+    name = f"{getattr(mask, '__module__', '')}.{getattr(mask, '__qualname__', repr(mask))}"
+    code = getattr(mask, '__code__', None)
+    if code is None:
+        return name
+    return f"{name}:{hashlib.sha256(marshal.dumps(code)).hexdigest()}"
+
+
+def _snapshot(shifts_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Hash each shift's content alongside its parsed timeline entry.
+    
+    Args:
+        shifts_df: DataFrame containing shift data
+        
+    Returns:
+        Physician timeline with a row_hash column per shift
+    """
+    check_shift_ids(shifts_df, 'Incremental validation')
+    
+    row_hash = row_hashes(shifts_df)
+    snapshot = physician_timeline(shifts_df)
+    snapshot['row_hash'] = row_hash[snapshot['source_row'].to_numpy()]
+    return snapshot
@@ -0,0 +1,197 @@
+"""
+Polars backend for the built-in shift rules of ED Physician Compensation System.
+
+The built-in rules are expressed as Polars expressions over one lazy query,
+so sorting, window functions and the as-of join for preceding shifts are
+planned together and run multithreaded. Issues are returned as the pandas
+frame the pandas rule registry produces.
+"""
+import string
+from datetime import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from validation.frames import ISSUE_COLUMNS, column_or_none
+from validation.rules import RuleRegistry, order_keys
+from utils.timestamps import UNITS_PER_SECOND, ensure_datetime
+
+
+def _time_offset(value: time) -> pl.Expr:
+    return pl.duration(hours=value.hour, minutes=value.minute, seconds=value.second)
+
+
+def _non_hourly_start(params: Dict[str, Any]) -> pl.Expr:
+    return pl.col('start_time').is_not_null() & (pl.col('start_time').dt.minute() != 0)
+
+
+def _short_shift(params: Dict[str, Any]) -> pl.Expr:
+    return pl.col('duration_hours') < params['min_shift_hours']
+
+
+def _long_shift(params: Dict[str, Any]) -> pl.Expr:
+    return pl.col('duration_hours') > params['max_shift_hours']
+
+
+def _overlapping_shift(params: Dict[str, Any]) -> pl.Expr:
+    return pl.col('prior_end') > pl.col('start_time')
+
+
+def _overlapping_next_shift(params: Dict[str, Any]) -> pl.Expr:
+    return pl.col('next_start') < pl.col('end_time')
+
+
+def _early_start(params: Dict[str, Any]) -> pl.Expr:
+    return (
+        (pl.col('time_of_day') < _time_offset(params['early_start_threshold']))
+        & pl.col('preceding_end').is_null()
+        & ~(
+            pl.col('prior_end') >= pl.col('start_time') - params['preceding_shift_gap']
+        ).fill_null(False)
+    )
+
+
+# Built-in rule name -> Polars mask
+POLARS_MASKS: Dict[str, Callable[[Dict[str, Any]], pl.Expr]] = {
+    'non_hourly_start': _non_hourly_start,
+    'short_shift': _short_shift,
+    'long_shift': _long_shift,
+    'overlapping_shift': _overlapping_shift,
+    'overlapping_next_shift': _overlapping_next_shift,
+    'early_start': _early_start
+}
+
+
+def timeline(shifts_df: pd.DataFrame, params: Dict[str, Any]) -> pl.LazyFrame:
+    """
+    Build the sorted shift timeline with every derived column the rules read.
+    
+    Args:
+        shifts_df: DataFrame containing shift data
+        params: Validator settings
+    
+    Returns:
+        LazyFrame sorted by physician and start time, nulls last, numbered
+        by timeline_row
+    """
+    frame = pd.DataFrame({
+        'shift_id': column_or_none(shifts_df, 'shift_id'),
+        'physician_id': shifts_df['physician_id'],
+        'start_time': ensure_datetime(shifts_df['start_time']),
+        'end_time': ensure_datetime(shifts_df['end_time'])
+    })
+    if 'shift_hours' in shifts_df.columns:
+        frame['shift_hours'] = shifts_df['shift_hours']
+    data = pl.from_pandas(frame.reset_index(drop=True)).lazy().with_row_index('source_row')
+    
+    if 'shift_hours' in frame.columns:
+        duration_hours = pl.col('shift_hours')
+    else:
+        units = UNITS_PER_SECOND[data.collect_schema()['start_time'].time_unit]
+        duration_hours = (
+            (pl.col('end_time') - pl.col('start_time')).cast(pl.Int64) / units / 3600
+        )
+    
+    same_previous = pl.col('physician_id') == pl.col('physician_id').shift(1)
+    same_next = pl.col('physician_id') == pl.col('physician_id').shift(-1)
+    data = data.sort(
+        ['physician_id', 'start_time'], maintain_order=True, nulls_last=True
+    ).with_row_index('timeline_row').with_columns(
+        duration_hours=duration_hours,
+        time_of_day=pl.duration(
+            hours=pl.col('start_time').dt.hour(),
+            minutes=pl.col('start_time').dt.minute(),
+            seconds=pl.col('start_time').dt.second()
+        ),
+        prior_end=pl.when(same_previous).then(
+            pl.col('end_time').cum_max().over('physician_id').shift(1)
+        ),
+        next_start=pl.when(same_next).then(pl.col('start_time').shift(-1))
+    )
+    
+    # Nearest earlier shift end for the same physician within the allowed gap
+    starts = data.select('source_row', 'physician_id', 'start_time').drop_nulls(
+        'start_time'
+    ).sort('start_time', maintain_order=True)
+    ends = data.select(
+        'physician_id', preceding_end=pl.col('end_time')
+    ).drop_nulls('preceding_end').sort('preceding_end', maintain_order=True)
+    preceding = starts.join_asof(
+        ends, left_on='start_time', right_on='preceding_end', by='physician_id',
+        strategy='backward', tolerance=params['preceding_shift_gap'],
+        check_sortedness=False
+    ).select('source_row', 'preceding_end')
+    return data.join(preceding, on='source_row', how='left', maintain_order='left')
+
+
+def _describe(template: str, params: Dict[str, Any], schema: pl.Schema) -> pl.Expr:
+    """Render a rule's str.format template as a Polars string expression."""
+    parts = []
+    for literal, field, spec, _ in string.Formatter().parse(template):
+        if literal:
+            parts.append(pl.lit(literal))
+        if field is None:
+            continue
+        if field in params:
+            parts.append(pl.lit(format(params[field], spec)))
+        elif isinstance(schema[field], pl.Datetime) and spec:
+            parts.append(pl.col(field).dt.strftime(spec))
+        else:
+            parts.append(pl.col(field).map_elements(
+                ('{:' + spec + '}').format, return_dtype=pl.String
+            ))
+    return pl.concat_str(parts)
+
+
+def run_rules(registry: RuleRegistry, shifts_df: pd.DataFrame, params: Dict[str, Any],
+              names: Optional[List[str]] = None, with_rule: bool = False) -> pd.DataFrame:
+    """
+    Evaluate built-in rules with Polars.
+    
+    Args:
+        registry: Rules to run; every rule must be a built-in rule
+        shifts_df: DataFrame containing shift data
+        params: Validator settings
+        names: Rules to run, defaults to all registered rules
+        with_rule: Add a rule column naming the rule behind each issue
+    
+    Returns:
+        DataFrame of issues in the order RuleRegistry.evaluate reports them
+    """
+    rules = registry.select(names)
+    unsupported = [rule.name for rule in rules if rule.name not in POLARS_MASKS]
+    if unsupported:
+        raise ValueError(
+            f"Rules {unsupported} have no Polars implementation; use the pandas backend"
+        )
+    
+    columns = ISSUE_COLUMNS + ['rule'] if with_rule else ISSUE_COLUMNS
+    data = timeline(shifts_df, params)
+    schema = data.collect_schema()
+    keys = order_keys(rules)
+    blocks = [
+        data.filter(POLARS_MASKS[rule.name](params).fill_null(False)).select(
+            'shift_id',
+            issue_type=pl.lit(rule.issue_type),
+            description=_describe(rule.description, params, schema),
+            rule=pl.lit(rule.name),
+            block=pl.lit(keys[rule.name][0], dtype=pl.Int64),
+            row=pl.col('source_row' if rule.order == 'source' else 'timeline_row')
+            .cast(pl.Int64),
+            rank=pl.lit(keys[rule.name][1], dtype=pl.Int64)
+        )
+        for rule in rules
+    ]
+    if not blocks:
+        return pd.DataFrame(columns=columns)
+    
+    issues = pl.concat(blocks).sort(['block', 'row', 'rank'], maintain_order=True).collect()
+    if issues.is_empty():
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame({
+        column: issues[column].to_numpy() if column == 'shift_id'
+        else np.asarray(issues[column].to_list(), dtype=object)
+        for column in columns
+    })
@@ -0,0 +1,403 @@
+"""
+Validation rule registry for ED Physician Compensation System.
+
+Each rule declares the columns it reads and returns a boolean mask over a
+ShiftFrame. The frame parses, sorts and derives shared columns once, so
+registering another rule adds a mask evaluation, not another pass over the
+shift data.
+"""
+import string
+from datetime import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from validation.frames import ISSUE_COLUMNS, combine_issues, issue_frame, physician_timeline
+
+SHIFT_TIME_RULES = ['non_hourly_start', 'short_shift', 'long_shift']
+OVERLAP_RULES = ['overlapping_shift', 'overlapping_next_shift']
+# Row orders a rule can report in: physician and start time, or input rows
+RULE_ORDERS = ('timeline', 'source')
+
+
+class ShiftFrame:
+    """Shift data sorted by physician and start time with lazily derived columns."""
+    
+    def __init__(self, shifts_df: pd.DataFrame, params: Optional[Dict[str, Any]] = None):
+        """
+        Parse and sort shift data once for rule evaluation.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
+            params: Validator settings available to rules and description templates
+        """
+        self.source = shifts_df
+        self.params = dict(params or {})
+        self.data = physician_timeline(shifts_df)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    def __contains__(self, name: str) -> bool:
+        return (name in self.data.columns or name in DERIVED_COLUMNS
+                or name in self.source.columns)
+    
+    def __getitem__(self, name: str) -> pd.Series:
+        """
+        Return a column in timeline order, deriving and caching it on first use.
+        
+        Args:
+            name: Timeline, derived or source column name
+            
+        Returns:
+            Series aligned with the sorted timeline
+        """
+        if name not in self.data.columns:
+            if name in DERIVED_COLUMNS:
+                self.data[name] = DERIVED_COLUMNS[name](self)
+            elif name in self.source.columns:
+                self.data[name] = (
+                    self.source[name].iloc[self.data['source_row'].to_numpy()]
+                    .reset_index(drop=True)
+                )
+            else:
+                raise KeyError(f"Unknown validation column '{name}'")
+        return self.data[name]
+
+
+def _duration_hours(frame: ShiftFrame) -> pd.Series:
+    # Trust hours precomputed by normalize_shift_times at ingest
+    if 'shift_hours' in frame.source.columns:
+        return frame['shift_hours']
+    return (frame['end_time'] - frame['start_time']).dt.total_seconds() / 3600
+
+
+def _time_of_day(frame: ShiftFrame) -> pd.Series:
+    # Wall-clock fields; subtracting local midnight is off by an hour on DST days
+    start_time = frame['start_time']
+    seconds = start_time.dt.hour * 3600 + start_time.dt.minute * 60 + start_time.dt.second
+    return pd.to_timedelta(seconds, unit='s')
+
+
+def _same_physician_as_previous(frame: ShiftFrame) -> pd.Series:
+    physician_id = frame['physician_id']
+    return physician_id.eq(physician_id.shift())
+
+
+def _previous_end(frame: ShiftFrame) -> pd.Series:
+    return frame['end_time'].shift().where(frame['same_physician_as_previous'])
+
+
+def _next_start(frame: ShiftFrame) -> pd.Series:
+    physician_id = frame['physician_id']
+    return frame['start_time'].shift(-1).where(physician_id.eq(physician_id.shift(-1)))
+
+
+def _prior_end(frame: ShiftFrame) -> pd.Series:
+    # Latest end time of any earlier shift for the same physician, so a long
+    # shift is compared against every later shift it spans
+    running_end = frame.data.groupby('physician_id', sort=False)['end_time'].cummax()
+    return running_end.shift().where(frame['same_physician_as_previous'])
+
+
+def _preceding_end(frame: ShiftFrame) -> pd.Series:
+    # Nearest earlier shift end for the same physician within the allowed gap
+    data = frame.data
+    starts = pd.DataFrame({
+        'physician_id': data['physician_id'],
+        'start_time': data['start_time'],
+        'position': np.arange(len(data))
+    })
+    starts = starts[starts['start_time'].notna()].sort_values('start_time', kind='mergesort')
+    ends = pd.DataFrame({
+        'physician_id': data['physician_id'],
+        'preceding_end': data['end_time']
+    })
+    ends = ends[ends['preceding_end'].notna()].sort_values('preceding_end', kind='mergesort')
+    matched = pd.merge_asof(
+        starts,
+        ends,
+        left_on='start_time',
+        right_on='preceding_end',
+        by='physician_id',
+        direction='backward',
+        tolerance=pd.Timedelta(frame.params['preceding_shift_gap'])
+    )
+    return matched.set_index('position')['preceding_end'].reindex(np.arange(len(data)))
+
+
+DERIVED_COLUMNS: Dict[str, Callable[[ShiftFrame], pd.Series]] = {
+    'duration_hours': _duration_hours,
+    'time_of_day': _time_of_day,
+    'same_physician_as_previous': _same_physician_as_previous,
+    'previous_end': _previous_end,
+    'next_start': _next_start,
+    'prior_end': _prior_end,
+    'preceding_end': _preceding_end
+}
+
+
+def _format_column(values: pd.Series, spec: str) -> pd.Series:
+    """Format a column the way str.format would format each value."""
+    if pd.api.types.is_datetime64_any_dtype(values) and spec:
+        formatted = values.dt.strftime(spec)
+    else:
+        formatted = values.map(('{:' + spec + '}').format)
+    return formatted.astype(object)
+
+
+class ValidationRule:
+    """A vectorized validation check over a ShiftFrame."""
+    
+    def __init__(self, issue_type: str, mask: Callable[[ShiftFrame], pd.Series],
+                 description: str, columns: Iterable[str] = (),
+                 name: Optional[str] = None, check: Optional[str] = None,
+                 order: str = 'timeline'):
+        """
+        Define a validation rule.
+        
+        Args:
+            issue_type: Issue type reported for flagged shifts
+            mask: Function returning a boolean Series in timeline order
+            description: str.format template; fields name frame columns or
+                validator settings, and datetime fields take strftime specs
+            columns: Frame columns the rule reads, derived before evaluation
+            name: Registry key, defaults to the issue type
+            check: Check the rule belongs to, defaults to the rule name;
+                issues of rules sharing a check are reported as one block
+            order: 'timeline' to report flagged shifts by physician and start
+                time, or 'source' to report them in input row order
+        """
+        if order not in RULE_ORDERS:
+            raise ValueError(f"Unknown rule order '{order}', expected one of {RULE_ORDERS}")
+        self.issue_type = issue_type
+        self.mask = mask
+        self.description = description
+        self.columns = list(columns)
+        self.name = name or issue_type
+        self.check = check or self.name
+        self.order = order
+    
+    def describe(self, frame: ShiftFrame, flagged: np.ndarray) -> pd.Series:
+        """
+        Render the description template for the flagged rows.
+        
+        Args:
+            frame: Frame the rule was evaluated against
+            flagged: Boolean mask of flagged rows in timeline order
+            
+        Returns:
+            Series of descriptions for the flagged rows
+        """
+        text = pd.Series('', index=frame.data.index[flagged], dtype=object)
+        for literal, field, spec, _ in string.Formatter().parse(self.description):
+            text = text + literal
+            if field is None:
+                continue
+            if field in frame.params:
+                text = text + format(frame.params[field], spec)
+            else:
+                text = text + _format_column(frame[field][flagged], spec)
+        return text
+
+
+class RuleRegistry:
+    """Ordered collection of validation rules evaluated in a single pass."""
+    
+    def __init__(self, rules: Iterable[ValidationRule] = ()):
+        """
+        Initialize registry with an optional set of rules.
+        
+        Args:
+            rules: Rules to register, in evaluation order
+        """
+        self._rules: Dict[str, ValidationRule] = {}
+        for rule in rules:
+            self.register(rule)
+    
+    def register(self, rule: ValidationRule) -> None:
+        """Add a rule; names must be unique."""
+        if rule.name in self._rules:
+            raise ValueError(f"Validation rule '{rule.name}' is already registered")
+        self._rules[rule.name] = rule
+    
+    def unregister(self, name: str) -> None:
+        """Remove a rule by name."""
+        del self._rules[name]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._rules
+    
+    def __iter__(self) -> Iterator[ValidationRule]:
+        return iter(self._rules.values())
+    
+    def __len__(self) -> int:
+        return len(self._rules)
+    
+    def select(self, names: Optional[List[str]] = None) -> List[ValidationRule]:
+        """Rules to run, in registration order unless names gives another."""
+        return list(self) if names is None else [self._rules[name] for name in names]
+    
+    def evaluate(self, frame: ShiftFrame, names: Optional[List[str]] = None,
+                 with_rule: bool = False) -> pd.DataFrame:
+        """
+        Evaluate rules against a prepared frame.
+        
+        Args:
+            frame: ShiftFrame shared by every rule
+            names: Rules to run, defaults to all registered rules
+            with_rule: Add a rule column naming the rule behind each issue
+            
+        Returns:
+            DataFrame of issues in check blocks, see order_keys
+        """
+        rules = self.select(names)
+        keys = order_keys(rules)
+        timeline_rows = np.arange(len(frame))
+        
+        blocks = []
+        for rule in rules:
+            for column in rule.columns:
+                frame[column]
+            flagged = rule.mask(frame).fillna(False).to_numpy(dtype=bool)
+            rows = frame['source_row'].to_numpy() if rule.order == 'source' else timeline_rows
+            block, rank = keys[rule.name]
+            issues = issue_frame(
+                frame['shift_id'][flagged], rule.issue_type,
+                rule.describe(frame, flagged),
+                order=(rows[flagged], rank), block=block
+            )
+            issues['rule'] = rule.name
+            blocks.append(issues)
+        
+        return combine_issues(blocks, ISSUE_COLUMNS + ['rule'] if with_rule else ISSUE_COLUMNS)
+    
+    def sort_issues(self, issues: pd.DataFrame, timeline: pd.DataFrame,
+                    names: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Put issues gathered from several evaluations back in evaluate's order.
+        
+        Args:
+            issues: Issues with a rule column, for shifts with unique shift_id values
+            timeline: physician_timeline of the current shift data
+            names: Rules that were run, defaults to all registered rules
+            
+        Returns:
+            Issues in the order one evaluation over timeline would report them
+        """
+        rules = self.select(names)
+        keys = order_keys(rules)
+        rule = issues['rule']
+        by_source = rule.map({item.name: item.order == 'source' for item in rules}).to_numpy(bool)
+        shift_id = timeline['shift_id']
+        rows = np.where(
+            by_source,
+            issues['shift_id'].map(pd.Series(timeline['source_row'].to_numpy(), index=shift_id)),
+            issues['shift_id'].map(pd.Series(np.arange(len(timeline)), index=shift_id))
+        )
+        block = rule.map({name: key[0] for name, key in keys.items()}).to_numpy()
+        rank = rule.map({name: key[1] for name, key in keys.items()}).to_numpy()
+        return issues.iloc[np.lexsort((rank, rows, block))].reset_index(drop=True)
+
+
+def order_keys(rules: List[ValidationRule]) -> Dict[str, Tuple[int, int]]:
+    """
+    Output position of each rule's issues.
+    
+    Issues are reported in blocks, one per check in order of its first rule.
+    Within a block they follow each rule's row order, and rules flagging the
+    same row report in rule order.
+    
+    Args:
+        rules: Rules in evaluation order
+        
+    Returns:
+        Dictionary of rule name -> (block, rank)
+    """
+    blocks: Dict[str, int] = {}
+    return {
+        rule.name: (blocks.setdefault(rule.check, len(blocks)), rank)
+        for rank, rule in enumerate(rules)
+    }
+
+
+def _time_offset(value: time) -> pd.Timedelta:
+    return pd.Timedelta(hours=value.hour, minutes=value.minute, seconds=value.second)
+
+
+def _non_hourly_start(frame: ShiftFrame) -> pd.Series:
+    start_time = frame['start_time']
+    return start_time.notna() & (start_time.dt.minute != 0)
+
+
+def _short_shift(frame: ShiftFrame) -> pd.Series:
+    return frame['duration_hours'] < frame.params['min_shift_hours']
+
+
+def _long_shift(frame: ShiftFrame) -> pd.Series:
+    return frame['duration_hours'] > frame.params['max_shift_hours']
+
+
+def _overlapping_shift(frame: ShiftFrame) -> pd.Series:
+    return frame['prior_end'] > frame['start_time']
+
+
+def _overlapping_next_shift(frame: ShiftFrame) -> pd.Series:
+    # The next start is the earliest later start, so this flags every shift
+    # that a later shift begins inside, including long spanning shifts
+    return frame['next_start'] < frame['end_time']
+
+
+def _early_start(frame: ShiftFrame) -> pd.Series:
+    threshold = _time_offset(frame.params['early_start_threshold'])
+    # An earlier shift still running at the start, or ended within the gap,
+    # precedes it too; the as-of match only sees shifts ended by the start
+    running = frame['prior_end'] >= frame['start_time'] - pd.Timedelta(
+        frame.params['preceding_shift_gap']
+    )
+    return (frame['time_of_day'] < threshold) & frame['preceding_end'].isna() & ~running
+
+
+def default_rules() -> List[ValidationRule]:
+    """
+    Return the built-in shift rules in their reporting order.
+    
+    Time and duration issues follow input rows, as validate_shift_times
+    always reported them; overlap and early-start issues follow physician
+    and start time. Both shifts of an overlap are flagged: the later one
+    against the previous shift and the earlier one against the next shift.
+    """
+    return [
+        ValidationRule(
+            'non_hourly_start', _non_hourly_start,
+            "Shift starts at {start_time:%H:%M} instead of on the hour",
+            columns=['start_time'], check='shift_times', order='source'
+        ),
+        ValidationRule(
+            'short_shift', _short_shift,
+            "Shift duration ({duration_hours:.1f} hours) is below minimum ({min_shift_hours} hours)",
+            columns=['duration_hours'], check='shift_times', order='source'
+        ),
+        ValidationRule(
+            'long_shift', _long_shift,
+            "Shift duration ({duration_hours:.1f} hours) exceeds maximum ({max_shift_hours} hours)",
+            columns=['duration_hours'], check='shift_times', order='source'
+        ),
+        ValidationRule(
+            'overlapping_shift', _overlapping_shift,
+            "Shift overlaps with previous shift (ends at {prior_end:%Y-%m-%d %H:%M})",
+            columns=['start_time', 'prior_end'], check='overlapping_shift'
+        ),
+        ValidationRule(
+            'overlapping_shift', _overlapping_next_shift,
+            "Shift overlaps with next shift (starts at {next_start:%Y-%m-%d %H:%M})",
+            columns=['end_time', 'next_start'], name='overlapping_next_shift',
+            check='overlapping_shift'
+        ),
+        ValidationRule(
+            'early_start', _early_start,
+            "Shift starts at {start_time:%H:%M} without a preceding shift",
+            columns=['time_of_day', 'preceding_end', 'prior_end']
+        ),
+    ]
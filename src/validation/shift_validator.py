@@ -4,13 +4,25 @@ Shift validation module for ED Physician Compensation System.
 from datetime import datetime, time, timedelta
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from utils.timestamps import ensure_datetime
+from validation.frames import (ISSUE_COLUMNS, column_or_none, combine_issues, epoch_ns,
+                               issue_frame, physician_timeline)
+from validation.rules import (OVERLAP_RULES, SHIFT_TIME_RULES, RuleRegistry, ShiftFrame,
+                              ValidationRule, default_rules)
+
+BACKENDS = ('pandas', 'polars')
+
+
 class ShiftValidator:
     """Handles validation of shift data against various rules and sources."""
     
     def __init__(self, min_shift_hours: float = 4.0, max_shift_hours: float = 12.0,
-                 early_start_threshold: time = time(5, 0)):
+                 early_start_threshold: time = time(5, 0),
+                 preceding_shift_gap: timedelta = timedelta(hours=1),
+                 backend: str = 'pandas'):
         """
         Initialize validator with configurable parameters.
         
@@ -18,87 +30,151 @@ class ShiftValidator:
             min_shift_hours: Minimum allowed shift duration in hours
             max_shift_hours: Maximum allowed shift duration in hours
             early_start_threshold: Earliest allowed start time without preceding shift
+            preceding_shift_gap: Longest gap between a prior shift's end and an
+                early start for the prior shift to count as preceding it
+            backend: 'pandas', or 'polars' to evaluate the built-in shift rules
+                as one multithreaded Polars query (requires polars)
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
         self.min_shift_hours = min_shift_hours
         self.max_shift_hours = max_shift_hours
         self.early_start_threshold = early_start_threshold
+        self.preceding_shift_gap = preceding_shift_gap
+        self.backend = backend
+        self.rules = RuleRegistry(default_rules())
     
-    def validate_shift_times(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+    def register_rule(self, rule: ValidationRule) -> None:
         """
-        Validate shift start/end times and durations.
+        Add a site-specific rule to the single-pass rule evaluation.
+        
+        Args:
+            rule: Rule to evaluate alongside the built-in rules
+        """
+        self.rules.register(rule)
+    
+    def settings(self) -> Dict[str, object]:
+        """Validator settings available to rules and description templates."""
+        return {
+            'min_shift_hours': self.min_shift_hours,
+            'max_shift_hours': self.max_shift_hours,
+            'early_start_threshold': self.early_start_threshold,
+            'preceding_shift_gap': self.preceding_shift_gap
+        }
+    
+    def prepare(self, shifts_df: pd.DataFrame) -> ShiftFrame:
+        """
+        Parse and sort shift data once for rule evaluation.
         
         Args:
             shifts_df: DataFrame containing shift data
             
         Returns:
-            DataFrame with validation issues flagged
+            ShiftFrame carrying this validator's settings
+        """
+        return ShiftFrame(shifts_df, self.settings())
+    
+    def run_rules(self, shifts_df: pd.DataFrame,
+                  names: Optional[List[str]] = None, with_rule: bool = False) -> pd.DataFrame:
         """
-        issues = []
+        Evaluate registered rules in one pass over the shift data.
         
-        for idx, shift in shifts_df.iterrows():
-            start_time = pd.to_datetime(shift['start_time'])
-            end_time = pd.to_datetime(shift['end_time'])
+        Args:
+            shifts_df: DataFrame containing shift data
+            names: Rules to run, defaults to every registered rule
+            with_rule: Add a rule column naming the rule behind each issue
             
-            # Check start times on the hour
-            if start_time.minute != 0:
-                issues.append({
-                    'shift_id': shift.get('shift_id'),
-                    'issue_type': 'non_hourly_start',
-                    'description': f"Shift starts at {start_time.strftime('%H:%M')} instead of on the hour"
-                })
+        Returns:
+            DataFrame with validation issues, one block per check: time and
+            duration issues in input row order, then overlap and early-start
+            issues in physician and start time order, then site rules
+        """
+        if self.backend == 'polars':
+            from validation import polars_backend
+            return polars_backend.run_rules(
+                self.rules, shifts_df, self.settings(), names, with_rule
+            )
+        return self.rules.evaluate(self.prepare(shifts_df), names, with_rule)
+    
+    def validate_shift_times(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Validate shift start/end times and durations.
+        
+        Args:
+            shifts_df: DataFrame containing shift data
             
-            # Check shift duration
-            duration = (end_time - start_time).total_seconds() / 3600
-            if duration < self.min_shift_hours:
-                issues.append({
-                    'shift_id': shift.get('shift_id'),
-                    'issue_type': 'short_shift',
-                    'description': f"Shift duration ({duration:.1f} hours) is below minimum ({self.min_shift_hours} hours)"
-                })
-            elif duration > self.max_shift_hours:
-                issues.append({
-                    'shift_id': shift.get('shift_id'),
-                    'issue_type': 'long_shift',
-                    'description': f"Shift duration ({duration:.1f} hours) exceeds maximum ({self.max_shift_hours} hours)"
-                })
-        
-        return pd.DataFrame(issues)
+        Returns:
+            DataFrame with validation issues flagged
+        """
+        return self.run_rules(shifts_df, SHIFT_TIME_RULES)
     
     def check_overlapping_shifts(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
         """
         Identify overlapping shifts for the same physician.
         
+        Both shifts of an overlap are flagged: a shift starting before an
+        earlier shift ends is reported against the previous shift, and the
+        earlier shift is reported against the next shift, so a long shift
+        spanning later ones is reported too.
+        
         Args:
             shifts_df: DataFrame containing shift data
             
         Returns:
             DataFrame with overlapping shifts flagged
         """
-        issues = []
+        return self.run_rules(shifts_df, OVERLAP_RULES)
+    
+    def find_overlapping_pairs(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        List every pair of overlapping shifts for the same physician.
         
-        # Sort shifts by physician and start time
-        sorted_shifts = shifts_df.sort_values(['physician_id', 'start_time'])
+        Unlike check_overlapping_shifts, which flags each shift at most once
+        per side, this returns each pair explicitly, so a 24-hour shift that overlaps
+        several later shifts yields one row per overlapped shift. Each
+        physician's shifts are sorted once and the overlap partners of a
+        shift are found by binary search on start times, giving
+        O(n log n + k) work for n shifts and k overlapping pairs.
         
-        # Group by physician
-        for physician_id, physician_shifts in sorted_shifts.groupby('physician_id'):
-            shifts_list = physician_shifts.to_dict('records')
+        Args:
+            shifts_df: DataFrame containing shift data
             
-            for i in range(len(shifts_list) - 1):
-                current_shift = shifts_list[i]
-                next_shift = shifts_list[i + 1]
-                
-                current_end = pd.to_datetime(current_shift['end_time'])
-                next_start = pd.to_datetime(next_shift['start_time'])
-                
-                if current_end > next_start:
-                    issues.append({
-                        'shift_id': next_shift.get('shift_id'),
-                        'issue_type': 'overlapping_shift',
-                        'description': (f"Shift overlaps with previous shift "
-                                     f"(ends at {current_end.strftime('%Y-%m-%d %H:%M')})")
-                    })
-        
-        return pd.DataFrame(issues)
+        Returns:
+            DataFrame with physician_id, shift_id_a, shift_id_b and
+            overlap_minutes, where shift a starts no later than shift b
+        """
+        timeline = physician_timeline(shifts_df)
+        timeline = timeline[
+            timeline['start_time'].notna() & timeline['end_time'].notna()
+        ].reset_index(drop=True)
+        starts = epoch_ns(timeline['start_time'])
+        ends = epoch_ns(timeline['end_time'])
+        count = len(timeline)
+        
+        # For each shift, the index one past the last later shift (same
+        # physician) that starts before it ends
+        group_starts = np.flatnonzero(
+            timeline['physician_id'].ne(timeline['physician_id'].shift()).to_numpy()
+        )
+        group_ends = np.append(group_starts[1:], count)
+        upper = np.empty(count, dtype=np.int64)
+        for lo, hi in zip(group_starts, group_ends):
+            upper[lo:hi] = lo + np.searchsorted(starts[lo:hi], ends[lo:hi], side='left')
+        
+        # Expand each shift into its run of overlap partners
+        first = np.arange(count)
+        partners = np.maximum(upper - first - 1, 0)
+        a = np.repeat(first, partners)
+        run_offsets = np.arange(partners.sum()) - np.repeat(np.cumsum(partners) - partners, partners)
+        b = a + 1 + run_offsets
+        
+        overlap_ns = np.minimum(ends[a], ends[b]) - starts[b]
+        return pd.DataFrame({
+            'physician_id': timeline['physician_id'].to_numpy()[a],
+            'shift_id_a': timeline['shift_id'].to_numpy()[a],
+            'shift_id_b': timeline['shift_id'].to_numpy()[b],
+            'overlap_minutes': overlap_ns / 60e9
+        })
     
     def validate_early_starts(self, shifts_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -110,45 +186,26 @@ class ShiftValidator:
         Returns:
             DataFrame with early start issues flagged
         """
-        issues = []
-        
-        # Sort shifts by physician and start time
-        sorted_shifts = shifts_df.sort_values(['physician_id', 'start_time'])
-        
-        for physician_id, physician_shifts in sorted_shifts.groupby('physician_id'):
-            shifts_list = physician_shifts.to_dict('records')
-            
-            for i in range(len(shifts_list)):
-                current_shift = shifts_list[i]
-                start_time = pd.to_datetime(current_shift['start_time'])
-                
-                # Check if shift starts before threshold
-                if start_time.time() < self.early_start_threshold:
-                    # Check if there's a preceding shift
-                    if i == 0 or (pd.to_datetime(shifts_list[i-1]['end_time']).date() != start_time.date()):
-                        issues.append({
-                            'shift_id': current_shift.get('shift_id'),
-                            'issue_type': 'early_start',
-                            'description': (f"Shift starts at {start_time.strftime('%H:%M')} "
-                                         f"without a preceding shift")
-                        })
-        
-        return pd.DataFrame(issues)
+        return self.run_rules(shifts_df, ['early_start'])
     
     def validate_against_amion(self, actual_shifts: pd.DataFrame, 
-                             scheduled_shifts: pd.DataFrame) -> pd.DataFrame:
+                             scheduled_shifts: pd.DataFrame,
+                             start_tolerance_minutes: float = 0.0,
+                             end_tolerance_minutes: float = 0.0) -> pd.DataFrame:
         """
         Compare actual shifts against Amion schedule.
         
         Args:
             actual_shifts: DataFrame containing actual shift data
             scheduled_shifts: DataFrame containing Amion schedule data
+            start_tolerance_minutes: Start time difference allowed before a
+                mismatch is flagged
+            end_tolerance_minutes: End time difference allowed before a
+                mismatch is flagged
             
         Returns:
             DataFrame with discrepancies flagged
         """
-        issues = []
-        
         # Merge actual and scheduled shifts
         merged_shifts = pd.merge(
             actual_shifts,
@@ -157,55 +214,67 @@ class ShiftValidator:
             suffixes=('_actual', '_scheduled'),
             how='outer'
         )
+        row = np.arange(len(merged_shifts))
+        actual_ids = column_or_none(merged_shifts, 'shift_id_actual')
+        scheduled_ids = column_or_none(merged_shifts, 'shift_id_scheduled')
         
-        for _, shift in merged_shifts.iterrows():
-            # Check for missing actual shifts
-            if pd.isna(shift.get('start_time_actual')):
-                issues.append({
-                    'shift_id': shift.get('shift_id_scheduled'),
-                    'issue_type': 'missing_actual_shift',
-                    'description': "Scheduled shift has no corresponding actual shift"
-                })
-                continue
-            
-            # Check for unscheduled shifts
-            if pd.isna(shift.get('start_time_scheduled')):
-                issues.append({
-                    'shift_id': shift.get('shift_id_actual'),
-                    'issue_type': 'unscheduled_shift',
-                    'description': "Actual shift was not scheduled in Amion"
-                })
-                continue
-            
-            # Compare start and end times
-            actual_start = pd.to_datetime(shift['start_time_actual'])
-            actual_end = pd.to_datetime(shift['end_time_actual'])
-            scheduled_start = pd.to_datetime(shift['start_time_scheduled'])
-            scheduled_end = pd.to_datetime(shift['end_time_scheduled'])
-            
-            if actual_start != scheduled_start:
-                issues.append({
-                    'shift_id': shift.get('shift_id_actual'),
-                    'issue_type': 'start_time_mismatch',
-                    'description': (f"Actual start time ({actual_start.strftime('%H:%M')}) "
-                                 f"differs from scheduled ({scheduled_start.strftime('%H:%M')})")
-                })
-            
-            if actual_end != scheduled_end:
-                issues.append({
-                    'shift_id': shift.get('shift_id_actual'),
-                    'issue_type': 'end_time_mismatch',
-                    'description': (f"Actual end time ({actual_end.strftime('%H:%M')}) "
-                                 f"differs from scheduled ({scheduled_end.strftime('%H:%M')})")
-                })
-        
-        return pd.DataFrame(issues)
+        actual_start = ensure_datetime(column_or_none(merged_shifts, 'start_time_actual'))
+        actual_end = ensure_datetime(column_or_none(merged_shifts, 'end_time_actual'))
+        scheduled_start = ensure_datetime(column_or_none(merged_shifts, 'start_time_scheduled'))
+        scheduled_end = ensure_datetime(column_or_none(merged_shifts, 'end_time_scheduled'))
+        
+        # Missing actual shifts take precedence over unscheduled shifts, and
+        # time comparisons only apply when both sides are present
+        missing = actual_start.isna().to_numpy()
+        unscheduled = ~missing & scheduled_start.isna().to_numpy()
+        matched = ~missing & ~unscheduled
+        
+        start_mismatch = matched & (
+            (actual_start - scheduled_start).abs()
+            > pd.Timedelta(minutes=start_tolerance_minutes)
+        ).to_numpy()
+        end_mismatch = matched & (
+            (actual_end - scheduled_end).abs()
+            > pd.Timedelta(minutes=end_tolerance_minutes)
+        ).to_numpy()
+        
+        return combine_issues([
+            issue_frame(
+                scheduled_ids[missing], 'missing_actual_shift',
+                pd.Series("Scheduled shift has no corresponding actual shift",
+                          index=scheduled_ids.index[missing]),
+                order=(row[missing], 0)
+            ),
+            issue_frame(
+                actual_ids[unscheduled], 'unscheduled_shift',
+                pd.Series("Actual shift was not scheduled in Amion",
+                          index=actual_ids.index[unscheduled]),
+                order=(row[unscheduled], 0)
+            ),
+            issue_frame(
+                actual_ids[start_mismatch], 'start_time_mismatch',
+                "Actual start time (" + actual_start[start_mismatch].dt.strftime('%H:%M')
+                + ") differs from scheduled ("
+                + scheduled_start[start_mismatch].dt.strftime('%H:%M') + ")",
+                order=(row[start_mismatch], 1)
+            ),
+            issue_frame(
+                actual_ids[end_mismatch], 'end_time_mismatch',
+                "Actual end time (" + actual_end[end_mismatch].dt.strftime('%H:%M')
+                + ") differs from scheduled ("
+                + scheduled_end[end_mismatch].dt.strftime('%H:%M') + ")",
+                order=(row[end_mismatch], 2)
+            ),
+        ])
     
     def validate_all(self, actual_shifts: pd.DataFrame, 
                     scheduled_shifts: pd.DataFrame) -> pd.DataFrame:
         """
         Run all validation checks and combine results.
         
+        Registered shift rules, including site-specific ones, share a single
+        pass over the shift data, followed by the Amion reconciliation.
+        
         Args:
             actual_shifts: DataFrame containing actual shift data
             scheduled_shifts: DataFrame containing Amion schedule data
@@ -216,16 +285,16 @@ class ShiftValidator:
         all_issues = []
         
         # Run all validations
-        time_issues = self.validate_shift_times(actual_shifts)
-        overlap_issues = self.check_overlapping_shifts(actual_shifts)
-        early_start_issues = self.validate_early_starts(actual_shifts)
-        amion_issues = self.validate_against_amion(actual_shifts, scheduled_shifts)
+        results = [
+            self.run_rules(actual_shifts),
+            self.validate_against_amion(actual_shifts, scheduled_shifts)
+        ]
         
         # Combine all issues
-        for df in [time_issues, overlap_issues, early_start_issues, amion_issues]:
+        for df in results:
             if not df.empty:
                 all_issues.append(df)
         
         if all_issues:
             return pd.concat(all_issues, ignore_index=True)
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Streaming shift validation for ED Physician Compensation System.
+"""
+import os
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from utils.timestamps import ensure_datetime
+from validation.frames import ISSUE_COLUMNS, physician_timeline
+from validation.shift_validator import ShiftValidator
+
+IssueSink = Callable[[pd.DataFrame], None]
+
+
+class CsvIssueSink:
+    """Appends validation issues to a CSV file as they are produced."""
+    
+    def __init__(self, path: str):
+        """
+        Initialize sink, replacing any existing file.
+        
+        Args:
+            path: CSV file to write issues to
+        """
+        self.path = path
+        if os.path.exists(path):
+            os.remove(path)
+    
+    def __call__(self, issues: pd.DataFrame) -> None:
+        """Append a batch of issues, writing the header with the first batch."""
+        issues.to_csv(self.path, mode='a', index=False,
+                      header=not os.path.exists(self.path))
+
+
+class StreamingValidator:
+    """Validates shift data chunk by chunk with bounded memory."""
+    
+    def __init__(self, validator: ShiftValidator):
+        """
+        Initialize streaming validation.
+        
+        Args:
+            validator: Validator whose registered rules are applied
+        """
+        self.validator = validator
+    
+    def validate(self, chunks: Iterable[pd.DataFrame], sink: IssueSink) -> int:
+        """
+        Run the registered shift rules over a stream of shift chunks.
+        
+        Chunks may be partitioned by month, by physician or both, as long as
+        each physician's shifts arrive in chronological order. Shifts that
+        can still affect later shifts of the same physician - those ending
+        within the preceding-shift gap of the physician's latest start, plus
+        the physician's last shift - are carried into the next chunk as
+        context, so overlap and early-start results match a single pass.
+        A physician's last shift is only checked against the next shift once
+        that shift arrives, so its look-ahead issues come from the next chunk.
+        
+        Args:
+            chunks: Iterable of shift DataFrames with unique shift_id values
+            sink: Callable receiving each non-empty batch of issues
+            
+        Returns:
+            Total number of issues written to the sink
+        """
+        carry: Optional[pd.DataFrame] = None
+        awaiting_next = pd.Series(dtype=object)
+        lookahead = [rule.name for rule in self.validator.rules if 'next_start' in rule.columns]
+        total = 0
+        
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            window = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+            
+            issues = self.validator.run_rules(window, with_rule=True)
+            if carry is not None:
+                # Carried shifts were reported with the previous chunk, except
+                # for look-ahead rules on shifts that had no next shift yet
+                reported = issues['shift_id'].isin(carry['shift_id']) & ~(
+                    issues['shift_id'].isin(awaiting_next) & issues['rule'].isin(lookahead)
+                )
+                issues = issues[~reported]
+            if not issues.empty:
+                sink(issues[ISSUE_COLUMNS].reset_index(drop=True))
+                total += len(issues)
+            
+            carry = self._carry(window)
+            awaiting_next = physician_timeline(window).drop_duplicates(
+                'physician_id', keep='last'
+            )['shift_id']
+        
+        return total
+    
+    def _carry(self, window: pd.DataFrame) -> pd.DataFrame:
+        """
+        Select the shifts later chunks still depend on.
+        
+        Args:
+            window: Carried context plus the chunk just validated
+            
+        Returns:
+            Rows of the window kept as context for the next chunk
+        """
+        start_time = ensure_datetime(window['start_time'])
+        end_time = ensure_datetime(window['end_time'])
+        latest_start = start_time.groupby(window['physician_id']).transform('max')
+        gap = pd.Timedelta(self.validator.preceding_shift_gap)
+        
+        still_relevant = end_time >= latest_start - gap
+        last_shift = start_time.eq(latest_start)
+        return window[still_relevant | last_shift].reset_index(drop=True)